@@ -0,0 +1,167 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import functools
+import http.server
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from bench.synthetic_page import make_page
+from src.config import AppConfig
+from src.import_profile import parse_importtime
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# What main.py used to pull in at module load, before the lazy imports
+HEAVY_MODULES = (
+    "googleapiclient.discovery",
+    "google_auth_oauthlib.flow",
+    "google.auth.transport.requests",
+    "requests",
+    "bs4",
+    "rapidfuzz",
+    "dateutil.parser",
+)
+
+# A scheduled add_future run against an unchanged page, through main(). The OAuth client
+# file and the page URL are swapped for the bench's own; nothing else is stubbed.
+NOOP_RUN = """
+import sys, time
+from pathlib import Path
+import src.main as m
+from src.config import AppConfig
+m.oauth_client_json = lambda: Path("unused")
+m.AppConfig = lambda: AppConfig(source_url=%r)
+t0 = time.perf_counter()
+rc = m.main(["--mode", "add_future", "--no-metrics"])
+elapsed = time.perf_counter() - t0
+google = {n.split(".")[0] for n in sys.modules} & {"googleapiclient", "google", "google_auth_oauthlib"}
+print(rc, elapsed, " ".join(sorted(google)))
+"""
+
+SCENARIOS = {
+    "import src.main": "import src.main",
+    "import src.main + heavy deps (old eager cost)": "import src.main, " + ", ".join(HEAVY_MODULES),
+}
+
+
+def _run(args: List[str], env: Optional[dict] = None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, env=env)
+
+
+def _wall(args: List[str], runs: int) -> List[float]:
+    out: List[float] = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        _run(args)
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def loaded_heavy_modules() -> List[str]:
+    code = "import sys, src.main; print(' '.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    return _run(["-c", code]).stdout.split()
+
+
+def import_ms(code: str) -> float:
+    timings = parse_importtime(_run(["-X", "importtime", "-c", code]).stderr.splitlines())
+    return sum(t.cumulative_us for t in timings if t.depth == 0) / 1000
+
+
+def _synced_app_dir(app_data: Path, url: str) -> None:
+    """An app data dir as a successful sync of `url` leaves it: token, calendar id, page state."""
+    from src.models import UNDERGRAD
+    from src.page_state import check_page, mark_page_synced, sync_target
+    from src.state_store import save_state
+
+    cfg = AppConfig(source_url=url)
+    app_dir = app_data / "SabanciCalendarSync"
+    app_dir.mkdir(parents=True)
+    token_file, state_file = app_dir / "token.json", app_dir / "state.json"
+    token_file.write_text(json.dumps({"refresh_token": "bench"}), encoding="utf-8")
+    save_state(state_file, {"calendar_ids": {cfg.calendar_name(UNDERGRAD): "bench-calendar"}})
+
+    logger = logging.getLogger("sac_bench_noop")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    target = sync_target(state_file, token_file, [cfg.calendar_name(UNDERGRAD)])
+    check = check_page(url, state_file, cfg.strict_undergrad_only_default, logger, target=target)
+    mark_page_synced(state_file, check, cfg.strict_undergrad_only_default, (UNDERGRAD,), target)
+
+
+def noop_run(runs: int) -> Tuple[List[float], List[str], List[int]]:
+    """
+    Wall times of main() for a run whose page is unchanged, the Google library packages
+    it loaded (googleapiclient, google-auth, oauthlib) and its exit codes. Such a run
+    must not import any of them.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        site = Path(tmp) / "site"
+        site.mkdir()
+        (site / "page.html").write_text(make_page(1000), encoding="utf-8")
+
+        class Quiet(http.server.SimpleHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Quiet, directory=str(site)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/page.html"
+            _synced_app_dir(Path(tmp) / "appdata", url)
+            env = dict(os.environ, APPDATA=str(Path(tmp) / "appdata"))
+            times: List[float] = []
+            loaded: List[str] = []
+            codes: List[int] = []
+            for _ in range(runs):
+                # main() prints its summary first; the script's own line comes last
+                rc, elapsed, *modules = _run(["-c", NOOP_RUN % url], env=env).stdout.splitlines()[-1].split()
+                codes.append(int(rc))
+                times.append(float(elapsed))
+                loaded.extend(m for m in modules if m not in loaded)
+        finally:
+            server.shutdown()
+    return times, loaded, codes
+
+
+def main(runs: int = 10) -> int:
+    baseline = statistics.median(_wall(["-c", "pass"], runs))
+    print(f"runs per scenario:  {runs}")
+    print(f"interpreter only:   {baseline * 1000:.0f} ms (median)")
+
+    for label, code in SCENARIOS.items():
+        times = _wall(["-c", code], runs)
+        print(
+            f"{label}: median {statistics.median(times) * 1000:.0f} ms, min {min(times) * 1000:.0f} ms "
+            f"| imports {import_ms(code):.0f} ms"
+        )
+
+    times = _wall(["-m", "src.main", "--help"], runs)
+    print(f"src.main --help: median {statistics.median(times) * 1000:.0f} ms, min {min(times) * 1000:.0f} ms")
+
+    heavy = loaded_heavy_modules()
+    print(f"heavy modules loaded by import src.main: {', '.join(heavy) if heavy else 'none'}")
+
+    times, loaded, codes = noop_run(runs)
+    print(
+        f"no-op add_future run (unchanged page): median {statistics.median(times) * 1000:.0f} ms, "
+        f"min {min(times) * 1000:.0f} ms | exit codes {sorted(set(codes))}"
+    )
+    if loaded or any(codes):
+        print(f"FAIL: the no-op run loaded {', '.join(loaded) or 'no Google library'} and exited {codes}")
+        return 1
+    print("Google libraries loaded by the no-op run: none")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,100 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import random
+import time
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from dateutil import parser as dtparser
+
+from src import date_parse
+from src.date_parse import parse_undergrad_date_cell
+
+MONTHS_EN = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def make_cells(n: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    base = date(2024, 1, 1)
+    out: List[str] = []
+    for _ in range(n):
+        d1 = base + timedelta(days=rng.randint(0, 900))
+        d2 = d1 + timedelta(days=rng.randint(0, 60))
+        m1, m2 = MONTHS_EN[d1.month - 1], MONTHS_EN[d2.month - 1]
+        kind = rng.random()
+        if kind < 0.4:
+            cell = f"{d1.day:02d} {m1} {d1.year}"
+        elif kind < 0.6 and d1.month == d2.month and d1.year == d2.year:
+            cell = f"{d1.day:02d}-{d2.day:02d} {m1} {d1.year}"
+        elif kind < 0.8 and d1.year == d2.year:
+            cell = f"{d1.day:02d} {m1} - {d2.day:02d} {m2} {d2.year}"
+        elif kind < 0.95:
+            cell = f"{d1.day:02d} {m1} {d1.year} {d2.day:02d} {m2} {d2.year}"
+        else:
+            cell = rng.choice(["", "TBA", "Spring Semester", "see announcement"])
+        # Cells on the page carry stray whitespace/newlines
+        out.append(cell.replace(" ", rng.choice([" ", "  ", "\n "])))
+    return out
+
+
+def _dateutil_single(d: str) -> date:
+    return dtparser.parse(d, dayfirst=True, yearfirst=False, fuzzy=False).date()
+
+
+def reference_parse(text: str) -> Optional[Tuple[date, date]]:
+    """The previous implementation: same regexes, dateutil for every date."""
+    if not text:
+        return None
+    text = " ".join(text.split())
+
+    m = date_parse.SINGLE_DATE_RE.match(text)
+    if m:
+        d = _dateutil_single(text)
+        return d, d
+    for rx in (date_parse.RANGE_SAME_MONTH_RE, date_parse.RANGE_DIFF_MONTH_RE):
+        m = rx.match(text)
+        if m:
+            g = m.groups()
+            if rx is date_parse.RANGE_SAME_MONTH_RE:
+                start, end = _dateutil_single(f"{g[0]} {g[2]} {g[3]}"), _dateutil_single(f"{g[1]} {g[2]} {g[3]}")
+            else:
+                start, end = _dateutil_single(f"{g[0]} {g[1]} {g[4]}"), _dateutil_single(f"{g[2]} {g[3]} {g[4]}")
+            return None if end < start else (start, end)
+    m = date_parse.TWO_FULL_DATES_RE.match(text)
+    if m:
+        start, end = _dateutil_single(m.group(1)), _dateutil_single(m.group(2))
+        return None if end < start else (start, end)
+    try:
+        d = _dateutil_single(text)
+        return d, d
+    except Exception:
+        return None
+
+
+def _time(fn, cells: List[str]) -> float:
+    t0 = time.perf_counter()
+    for c in cells:
+        fn(c)
+    return time.perf_counter() - t0
+
+
+def main(n: int = 50_000):
+    cells = make_cells(n)
+
+    mismatches = sum(1 for c in cells if parse_undergrad_date_cell(c) != reference_parse(c))
+
+    ref_s = _time(reference_parse, cells)
+    date_parse._parse_known_formats.cache_clear()
+    cold_s = _time(parse_undergrad_date_cell, cells)
+    warm_s = _time(parse_undergrad_date_cell, cells)
+
+    print(f"cells:            {n}")
+    print(f"mismatches:       {mismatches}")
+    print(f"dateutil (old):   {ref_s:.3f}s  {n / ref_s:,.0f} cells/s")
+    print(f"fast, cold cache: {cold_s:.3f}s  {n / cold_s:,.0f} cells/s  ({ref_s / cold_s:.1f}x)")
+    print(f"fast, warm cache: {warm_s:.3f}s  {n / warm_s:,.0f} cells/s  ({ref_s / warm_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
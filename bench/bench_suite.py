@@ -0,0 +1,252 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bench.bench_date_parse import make_cells
+from bench.fake_calendar import FakeCalendarBackend
+from bench.synthetic_page import make_page
+from src import categorize as categorize_mod
+from src import date_parse
+from src.config import AppConfig
+from src.google_calendar import ensure_calendar
+from src.scraper import iter_program_events, scrape_undergrad_events
+from src.sync_engine import sync
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+SIZES = (10, 100, 1000, 10000)
+
+# Dates the synthetic page spans and the "today" each sync step runs at
+PAGE_START = date(2025, 1, 1)
+TODAY = date(2025, 6, 1)
+SYNC_STEPS = (
+    ("add_future", TODAY),
+    ("add_future_noop", TODAY),
+    ("add_future_remove_past", TODAY + timedelta(days=120)),
+    ("remove_past", TODAY + timedelta(days=240)),
+    ("remove_all", TODAY + timedelta(days=240)),
+    ("add_future_again", TODAY),
+    ("remove_all_recreate", TODAY),
+)
+# Scenario name -> sync mode, where they differ
+STEP_MODES = {"add_future_noop": "add_future", "add_future_again": "add_future", "remove_all_recreate": "remove_all"}
+
+# Slower than baseline by more than this factor counts as a regression; timings
+# shorter than TIME_FLOOR are too noisy to judge
+TIME_TOLERANCE = 1.5
+TIME_FLOOR = 0.05
+
+
+def _quiet_logger() -> logging.Logger:
+    logger = logging.getLogger("sac_bench")
+    logger.handlers[:] = [logging.NullHandler()]
+    logger.propagate = False
+    return logger
+
+
+def _result(seconds: float, items: int, api_calls: Optional[int] = None, **extra) -> Dict:
+    out = {"seconds": round(seconds, 6), "items": items, "per_sec": round(items / seconds, 1) if seconds else None}
+    if api_calls is not None:
+        out["api_calls"] = api_calls
+    out.update(extra)
+    return out
+
+
+def bench_scrape(rows: int, logger) -> Dict:
+    html = make_page(rows, start=PAGE_START)
+    t0 = time.perf_counter()
+    events, warnings = scrape_undergrad_events("bench://page", strict_undergrad_only=True, logger=logger, html=html)
+    return _result(time.perf_counter() - t0, len(events), warnings=len(warnings), html_kb=len(html) // 1024)
+
+
+def bench_parse(rows: int) -> Dict:
+    cells = make_cells(rows)
+    date_parse._parse_known_formats.cache_clear()
+    t0 = time.perf_counter()
+    for c in cells:
+        date_parse.parse_undergrad_date_cell(c)
+    return _result(time.perf_counter() - t0, len(cells))
+
+
+def bench_categorize(rows: int, logger) -> Dict:
+    events, _ = scrape_undergrad_events(
+        "bench://page", strict_undergrad_only=True, logger=logger, html=make_page(rows, start=PAGE_START)
+    )
+    titles = [e.title_raw for e in events]
+    categorize_mod.categorize.cache_clear()
+    t0 = time.perf_counter()
+    for t in titles:
+        categorize_mod.categorize(t)
+    return _result(time.perf_counter() - t0, len(titles))
+
+
+def bench_sync(rows: int, logger, latency: float, quota_error_rate: float) -> Dict[str, Dict]:
+    cfg = AppConfig()
+    backend = FakeCalendarBackend(latency=latency, quota_error_rate=quota_error_rate)
+    events, _ = scrape_undergrad_events(
+        "bench://page", strict_undergrad_only=True, logger=logger, html=make_page(rows, start=PAGE_START)
+    )
+
+    out: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = Path(tmp) / "state.json"
+        # Quota errors only apply to the sync itself, not to finding the calendar
+        rate, backend.quota_error_rate = backend.quota_error_rate, 0.0
+        cal_id = ensure_calendar(backend.service(), cfg.target_calendar_name, logger, state_file=state_file)
+        backend.quota_error_rate = rate
+
+        for name, today in SYNC_STEPS:
+            mode = STEP_MODES.get(name, name)
+            backend.reset_counters()
+            t0 = time.perf_counter()
+            stats = sync(
+                cfg=cfg,
+                logger=logger,
+                calendar_service=backend.service(),
+                calendar_id=cal_id,
+                parsed_events=events,
+                mode=mode,
+                strict_undergrad_only=True,
+                service_factory=backend.service,
+                state_file=state_file,
+                today_ist=today,
+                # Only this step may take the delete-and-recreate path
+                calendar_name=cfg.target_calendar_name if name == "remove_all_recreate" else None,
+            )
+            seconds = time.perf_counter() - t0
+            out[f"sync.{name}"] = _result(
+                seconds,
+                stats.api_ops,
+                api_calls=sum(backend.calls.values()),
+                round_trips=backend.round_trips,
+                calls=dict(sorted(backend.calls.items())),
+                created=stats.created,
+                updated=stats.updated,
+                deleted=stats.deleted,
+                errors=stats.errors,
+                retries=stats.retries,
+            )
+    return out
+
+
+def bench_pipeline(rows: int, logger, latency: float) -> Dict[str, Dict]:
+    """
+    Scrape + add_future into an empty calendar, first extracting the whole page and
+    then syncing, then streaming the scraper's generator straight into sync.
+    """
+    cfg = AppConfig()
+    html = make_page(rows, start=PAGE_START)
+    out: Dict[str, Dict] = {}
+    for name in ("batch", "streamed"):
+        backend = FakeCalendarBackend(latency=latency)
+        with tempfile.TemporaryDirectory() as tmp:
+            state_file = Path(tmp) / "state.json"
+            cal_id = ensure_calendar(backend.service(), cfg.target_calendar_name, logger, state_file=state_file)
+            backend.reset_counters()
+            t0 = time.perf_counter()
+            if name == "batch":
+                events, _ = scrape_undergrad_events("bench://page", strict_undergrad_only=True, logger=logger, html=html)
+            else:
+                events = iter_program_events("bench://page", True, logger, html=html)
+            stats = sync(
+                cfg=cfg,
+                logger=logger,
+                calendar_service=backend.service(),
+                calendar_id=cal_id,
+                parsed_events=events,
+                mode="add_future",
+                strict_undergrad_only=True,
+                service_factory=backend.service,
+                state_file=state_file,
+                today_ist=TODAY,
+            )
+            out[f"pipeline.{name}"] = _result(
+                time.perf_counter() - t0,
+                stats.api_ops,
+                api_calls=sum(backend.calls.values()),
+                created=stats.created,
+                errors=stats.errors,
+            )
+    return out
+
+
+def run_suite(sizes: List[int], latency: float, quota_error_rate: float) -> Dict[str, Dict]:
+    logger = _quiet_logger()
+    # The parser libraries are imported on first use; keep that out of the first timing
+    scrape_undergrad_events("bench://page", strict_undergrad_only=True, logger=logger, html=make_page(5))
+
+    results: Dict[str, Dict] = {}
+    for rows in sizes:
+        results[f"scrape/{rows}"] = bench_scrape(rows, logger)
+        results[f"parse/{rows}"] = bench_parse(rows)
+        results[f"categorize/{rows}"] = bench_categorize(rows, logger)
+        for name, r in bench_sync(rows, logger, latency, quota_error_rate).items():
+            results[f"{name}/{rows}"] = r
+        for name, r in bench_pipeline(rows, logger, latency).items():
+            results[f"{name}/{rows}"] = r
+    return results
+
+
+def compare(results: Dict[str, Dict], baselines: Dict[str, Dict]) -> List[str]:
+    """
+    Prints one line per scenario; returns the names that regressed against the baseline.
+    A scenario missing from baselines at a size the baselines cover counts too: it was
+    added without running --save-baseline.
+    """
+    regressions: List[str] = []
+    sizes = {name.rsplit("/", 1)[-1] for name in baselines}
+    print(f"{'scenario':<36} {'seconds':>9} {'items/s':>11} {'api':>6} {'vs base':>8}")
+    for name, r in results.items():
+        base = baselines.get(name)
+        note = ""
+        if base is None and name.rsplit("/", 1)[-1] in sizes:
+            regressions.append(name)
+            note = "NO BASELINE"
+        elif base:
+            ratio = r["seconds"] / base["seconds"] if base.get("seconds") else 1.0
+            note = f"{ratio:.2f}x"
+            more_calls = r.get("api_calls", 0) > base.get("api_calls", 0)
+            slower = ratio > TIME_TOLERANCE and r["seconds"] > TIME_FLOOR
+            if more_calls or slower:
+                regressions.append(name)
+                note += " REGRESSION" + (" (api calls)" if more_calls else "")
+        per_sec = f"{r['per_sec']:,.0f}" if r.get("per_sec") else "-"
+        print(f"{name:<36} {r['seconds']:>9.4f} {per_sec:>11} {r.get('api_calls', ''):>6} {note:>8}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Scrape/parse/categorize/sync benchmarks against a fake Calendar API.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="page sizes in rows")
+    ap.add_argument("--latency", type=float, default=0.005, help="seconds per fake API round trip")
+    ap.add_argument("--quota-error-rate", type=float, default=0.0, help="chance of a 403 rateLimitExceeded per call")
+    ap.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINES_PATH.name}")
+    ap.add_argument("--json", type=Path, help="also write the raw results here")
+    args = ap.parse_args(argv)
+
+    results = run_suite(args.sizes, args.latency, args.quota_error_rate)
+    baselines = json.loads(BASELINES_PATH.read_text(encoding="utf-8")) if BASELINES_PATH.exists() else {}
+    regressions = compare(results, baselines)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        BASELINES_PATH.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"\nBaselines written to {BASELINES_PATH}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
\ No newline at end of file
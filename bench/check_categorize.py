@@ -0,0 +1,65 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+from src import categorize as categorize_mod
+from src.categorize import DEFAULT_RULES, RULES_PATH, compile_rules, load_rules
+
+CORPUS_PATH = Path(__file__).with_name("categorize_corpus.tsv")
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> List[Tuple[str, str]]:
+    """(title, expected category name) pairs; "\\n" in a title stands for a newline."""
+    out: List[Tuple[str, str]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("#"):
+            continue
+        title, expected = line.rsplit("\t", 1)
+        out.append((title.replace("\\n", "\n"), expected))
+    return out
+
+
+def _mismatches(pattern, groups, corpus: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    out = []
+    for title, expected in corpus:
+        m = pattern.match(title)
+        got = groups[m.lastgroup].name if m else categorize_mod.FALLBACK.name
+        if got != expected:
+            out.append((title, expected, got))
+    return out
+
+
+def main() -> int:
+    """
+    Every corpus title must land in the category the keyword-list categorizer gave it
+    (first category in priority order wins), both with the rules file and with the
+    built-in copy that frozen builds fall back to.
+    """
+    corpus = load_corpus()
+    failed = False
+    file_rules = [(cat.name, patterns) for cat, patterns in load_rules()]
+    if file_rules != [(name, list(patterns)) for name, patterns in DEFAULT_RULES]:
+        print(f"DEFAULT_RULES differ from {RULES_PATH.name}")
+        failed = True
+
+    for label, rules in (
+        (RULES_PATH.name, load_rules()),
+        ("DEFAULT_RULES", [(categorize_mod._BY_NAME[n], p) for n, p in DEFAULT_RULES]),
+    ):
+        bad = _mismatches(*compile_rules(rules), corpus)
+        print(f"{label:<24} titles={len(corpus)} mismatches={len(bad)}")
+        for title, expected, got in bad[:20]:
+            print(f"  {title!r}: expected {expected!r}, got {got!r}")
+        failed = failed or bool(bad)
+
+    got = categorize_mod.categorize_many(t for t, _ in corpus)
+    bad = [(t, e) for (t, e), cat in zip(corpus, got) if cat.name != e]
+    print(f"{'categorize()':<24} titles={len(corpus)} mismatches={len(bad)}")
+    return 1 if failed or bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,300 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def _http_error(status: int, reason: str, message: str) -> HttpError:
+    content = json.dumps({"error": {"code": status, "message": message, "errors": [{"reason": reason}]}})
+    return HttpError(httplib2.Response({"status": status}), content.encode("utf-8"))
+
+
+class FakeCalendarBackend:
+    """
+    In-process stand-in for the Calendar v3 endpoints the app uses. One backend holds
+    the data; service() hands out googleapiclient-shaped views of it, so the sync
+    executor can build one per worker thread like it does with the real client.
+
+    latency is slept once per HTTP round trip (a batch is one round trip);
+    quota_error_rate is the chance that a call (or a batch sub-request) fails with
+    403 rateLimitExceeded.
+    """
+
+    def __init__(self, latency: float = 0.0, quota_error_rate: float = 0.0, page_size: int = 250, seed: int = 0):
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.page_size = page_size
+        self.calls: Counter = Counter()
+        self.round_trips = 0
+
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._seq = 0
+        self.calendars: Dict[str, Dict] = {}
+        # calendar id -> event id -> event, and an append-only change log for sync tokens
+        self.events: Dict[str, Dict[str, Dict]] = {}
+        self._changes: Dict[str, List] = {}
+        # Event ids ever used per calendar; like Google, deleted ones stay taken
+        self._used_ids: Dict[str, set] = {}
+        self.acl: Dict[str, List[Dict]] = {}
+
+    def service(self) -> "FakeService":
+        return FakeService(self)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.round_trips = 0
+
+    # ---- internals -------------------------------------------------------
+
+    def _round_trip(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.round_trips += 1
+
+    def _call(self, name: str, fn: Callable[[], object]):
+        with self._lock:
+            self.calls[name] += 1
+            if self.quota_error_rate and self._rng.random() < self.quota_error_rate:
+                raise _http_error(403, "rateLimitExceeded", "Rate Limit Exceeded")
+            return fn()
+
+    def _touch(self, cal_id: str, ev_id: str) -> None:
+        self._seq += 1
+        self._changes.setdefault(cal_id, []).append((self._seq, ev_id))
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids)}"
+
+
+def _overlaps(ev: Dict, time_min: Optional[str], time_max: Optional[str]) -> bool:
+    start = ev.get("start", {}).get("date", "")
+    end = ev.get("end", {}).get("date", "")
+    if time_min and end <= time_min[:10]:
+        return False
+    if time_max and start >= time_max[:10]:
+        return False
+    return True
+
+
+def _has_private_props(ev: Dict, filters: List[str]) -> bool:
+    props = ev.get("extendedProperties", {}).get("private", {}) or {}
+    for f in filters:
+        k, _, v = f.partition("=")
+        if props.get(k) != v:
+            return False
+    return True
+
+
+class _Request:
+    def __init__(self, backend: FakeCalendarBackend, name: str, fn: Callable[[], object]):
+        self._backend = backend
+        self.name = name
+        self._fn = fn
+
+    def run(self):
+        return self._backend._call(self.name, self._fn)
+
+    def execute(self, http=None, num_retries: int = 0):
+        self._backend._round_trip()
+        return self.run()
+
+
+class _Batch:
+    def __init__(self, backend: FakeCalendarBackend, callback):
+        self._backend = backend
+        self._callback = callback
+        self._items: List = []
+
+    def add(self, request: _Request, callback=None, request_id: Optional[str] = None) -> None:
+        self._items.append((request_id or str(len(self._items)), request, callback))
+
+    def execute(self, http=None) -> None:
+        self._backend._round_trip()
+        with self._backend._lock:
+            self._backend.calls["batch"] += 1
+        for request_id, request, callback in self._items:
+            try:
+                response, exception = request.run(), None
+            except HttpError as e:
+                response, exception = None, e
+            (callback or self._callback)(request_id, response, exception)
+
+
+class _Events:
+    def __init__(self, backend: FakeCalendarBackend):
+        self._b = backend
+
+    def list(self, calendarId: str, pageToken: Optional[str] = None, syncToken: Optional[str] = None,
+             timeMin: Optional[str] = None, timeMax: Optional[str] = None,
+             privateExtendedProperty: Optional[List[str]] = None, maxResults: int = 250, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            store = b.events.setdefault(calendarId, {})
+            if syncToken:
+                since = int(syncToken)
+                changed = sorted({ev_id for seq, ev_id in b._changes.get(calendarId, []) if seq > since})
+                items = [dict(store[i]) if i in store else {"id": i, "status": "cancelled"} for i in changed]
+            else:
+                items = [
+                    dict(ev) for _, ev in sorted(store.items())
+                    if _overlaps(ev, timeMin, timeMax) and _has_private_props(ev, privateExtendedProperty or [])
+                ]
+
+            page = min(maxResults, b.page_size)
+            offset = int(pageToken or 0)
+            resp: Dict = {"items": items[offset:offset + page]}
+            if offset + page < len(items):
+                resp["nextPageToken"] = str(offset + page)
+            else:
+                resp["nextSyncToken"] = str(b._seq)
+            return resp
+
+        return _Request(b, "events.list", fn)
+
+    def insert(self, calendarId: str, body: Dict, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            ev = dict(body, status="confirmed")
+            ev.setdefault("id", b._new_id("ev"))
+            used = b._used_ids.setdefault(calendarId, set())
+            if ev["id"] in used:
+                raise _http_error(409, "duplicate", "The requested identifier already exists.")
+            used.add(ev["id"])
+            b.events.setdefault(calendarId, {})[ev["id"]] = ev
+            b._touch(calendarId, ev["id"])
+            return dict(ev)
+
+        return _Request(b, "events.insert", fn)
+
+    def patch(self, calendarId: str, eventId: str, body: Dict, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            store = b.events.setdefault(calendarId, {})
+            if eventId not in store:
+                raise _http_error(404, "notFound", "Not Found")
+            store[eventId].update(body)
+            b._touch(calendarId, eventId)
+            return dict(store[eventId])
+
+        return _Request(b, "events.patch", fn)
+
+    def delete(self, calendarId: str, eventId: str, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            store = b.events.setdefault(calendarId, {})
+            if store.pop(eventId, None) is None:
+                raise _http_error(410, "deleted", "Resource has been deleted")
+            b._touch(calendarId, eventId)
+            return ""
+
+        return _Request(b, "events.delete", fn)
+
+
+class _Calendars:
+    def __init__(self, backend: FakeCalendarBackend):
+        self._b = backend
+
+    def get(self, calendarId: str, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            if calendarId not in b.calendars:
+                raise _http_error(404, "notFound", "Not Found")
+            return dict(b.calendars[calendarId])
+
+        return _Request(b, "calendars.get", fn)
+
+    def insert(self, body: Dict, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            cal = dict(body, id=b._new_id("cal"))
+            b.calendars[cal["id"]] = cal
+            b.acl[cal["id"]] = [{"role": "owner", "scope": {"type": "user", "value": "me@example.com"}}]
+            return dict(cal)
+
+        return _Request(b, "calendars.insert", fn)
+
+    def delete(self, calendarId: str, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            if b.calendars.pop(calendarId, None) is None:
+                raise _http_error(404, "notFound", "Not Found")
+            b.events.pop(calendarId, None)
+            b._changes.pop(calendarId, None)
+            b._used_ids.pop(calendarId, None)
+            b.acl.pop(calendarId, None)
+            return ""
+
+        return _Request(b, "calendars.delete", fn)
+
+
+class _CalendarList:
+    def __init__(self, backend: FakeCalendarBackend):
+        self._b = backend
+
+    def list(self, pageToken: Optional[str] = None, maxResults: int = 250, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            items = [dict(c) for _, c in sorted(b.calendars.items())]
+            offset = int(pageToken or 0)
+            resp: Dict = {"items": items[offset:offset + maxResults]}
+            if offset + maxResults < len(items):
+                resp["nextPageToken"] = str(offset + maxResults)
+            return resp
+
+        return _Request(b, "calendarList.list", fn)
+
+
+class _Acl:
+    def __init__(self, backend: FakeCalendarBackend):
+        self._b = backend
+
+    def list(self, calendarId: str, **kw) -> _Request:
+        b = self._b
+
+        def fn():
+            if calendarId not in b.calendars:
+                raise _http_error(404, "notFound", "Not Found")
+            return {"items": [dict(r) for r in b.acl.get(calendarId, [])]}
+
+        return _Request(b, "acl.list", fn)
+
+
+class FakeService:
+    def __init__(self, backend: FakeCalendarBackend):
+        self._backend = backend
+
+    def events(self) -> _Events:
+        return _Events(self._backend)
+
+    def calendars(self) -> _Calendars:
+        return _Calendars(self._backend)
+
+    def calendarList(self) -> _CalendarList:
+        return _CalendarList(self._backend)
+
+    def acl(self) -> _Acl:
+        return _Acl(self._backend)
+
+    def new_batch_http_request(self, callback=None) -> _Batch:
+        return _Batch(self._backend, callback)
\ No newline at end of file
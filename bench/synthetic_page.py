@@ -0,0 +1,75 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+from typing import List
+
+MONTHS_EN = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+TITLES = [
+    "First day of classes",
+    "Last day of classes",
+    "Final Exams",
+    "Midterm Exams",
+    "Add-Drop Period",
+    "Course Registration",
+    "Republic Day Holiday",
+    "Commencement Ceremony",
+    "Tuition payment deadline",
+    "Make-up exams",
+    "Orientation",
+    "Last day to withdraw from a course",
+    "Submission of grades",
+    "Summer School",
+]
+
+
+def _date_text(d1: date, d2: date) -> str:
+    m1, m2 = MONTHS_EN[d1.month - 1], MONTHS_EN[d2.month - 1]
+    if d1 == d2:
+        return f"{d1.day:02d} {m1} {d1.year}"
+    if d1.month == d2.month and d1.year == d2.year:
+        return f"{d1.day:02d}-{d2.day:02d} {m1} {d1.year}"
+    return f"{d1.day:02d} {m1} - {d2.day:02d} {m2} {d2.year}"
+
+
+def make_page(rows: int, tables: int = 0, start: date = date(2025, 1, 1), days: int = 720, seed: int = 1) -> str:
+    """
+    Academic-calendar-like HTML with about `rows` event rows spread over `tables` tables
+    (default: one per ~40 rows). Mixes header styles, tables without an UNDER G. column,
+    empty/TBA cells, inline markup in titles and the non-table noise of the real page.
+    """
+    rng = random.Random(seed)
+    tables = tables or max(1, rows // 40)
+    out: List[str] = [
+        "<!DOCTYPE html><html><head><title>Academic Calendar</title>",
+        "<script>var tpl = '<table><tr><td>not a table</td></tr></table>';</script></head>",
+        "<body><nav><ul><li>Home</li><li>Students</li></ul></nav><div class='content'><p>Intro<p>Notes",
+    ]
+    for t in range(tables):
+        n = rows // tables + (1 if t < rows % tables else 0)
+        style = rng.choice(["thead", "th", "td"])
+        header = ["Event", "UNDER G.", "GRAD."] if rng.random() < 0.85 else ["Event", "Date"]
+        cell = "td" if style == "td" else "th"
+        header_row = "<tr>" + "".join(f"<{cell}>{h}</{cell}>" for h in header) + "</tr>"
+
+        out.append(f"<h3>Term {t + 1}</h3><table class='cal t{t}'>")
+        out.append(f"<thead>{header_row}</thead><tbody>" if style == "thead" else header_row)
+        for i in range(n):
+            d1 = start + timedelta(days=rng.randint(0, days))
+            d2 = d1 + timedelta(days=rng.choice([0, 0, 0, 1, 2, 4, 10, 40]))
+            text = _date_text(d1, d2)
+            undergrad = text if rng.random() < 0.9 else rng.choice(["", "TBA", "&nbsp;"])
+            title = rng.choice(TITLES) + (f" ({i})" if rng.random() < 0.6 else "")
+            if rng.random() < 0.1:
+                title = f"<b>{title}</b>\n <br/> <i>(Fall)</i>"
+            if rng.random() < 0.97:
+                out.append(f"<tr><td>{title}</td><td>{undergrad}</td><td>{text}</td></tr>")
+            else:
+                out.append(f"<tr><td colspan='3'>{title}</td></tr>")
+        if style == "thead":
+            out.append("</tbody>")
+        out.append("</table><p>See the announcements page for changes.</p>")
+    out.append("</div><footer>Sabanci University</footer></body></html>")
+    return "\n".join(out)
\ No newline at end of file
@@ -24,5 +24,18 @@ def state_path() -> Path:
     return app_data_dir() / "state.json"
 
 
+def plan_path(program: str = "") -> Path:
+    # The undergrad plan keeps the plain name; other programs get plan.<program>.json
+    return app_data_dir() / (f"plan.{program}.json" if program else "plan.json")
+
+
+def lock_path() -> Path:
+    return app_data_dir() / "sync.lock"
+
+
+def log_json_path() -> Path:
+    return app_data_dir() / "sync.jsonl"
+
+
 def log_path() -> Path:
     return app_data_dir() / "sync.log"
\ No newline at end of file
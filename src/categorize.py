@@ -1,9 +1,12 @@
 # Made by canadaaww
 from __future__ import annotations
 
+import json
 import re
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
 
 
 @dataclass(frozen=True)
@@ -57,43 +60,90 @@ CATEGORIES: List[Category] = [
 FALLBACK = CATEGORIES[1]  # admin/procedures
 
 
-_KEYWORDS: List[Tuple[Category, List[re.Pattern]]] = [
-    (CATEGORIES[0], [re.compile(p, re.I) for p in [
-        r"\bapplication\b", r"\bapply\b", r"\badmission\b", r"\btransfer\b",
-        r"\bentry\b", r"\bdeclaration\b", r"\bmajor\b", r"\bminor\b",
-        r"\bdouble\s+major\b", r"\bprogram\b", r"\bexchange\s+students?\b",
-        r"\binternational\s+students?\b",
-    ]]),
-    (CATEGORIES[1], [re.compile(p, re.I) for p in [
+RULES_PATH = Path(__file__).with_name("categorize_rules.json")
+
+# Same table as categorize_rules.json, used when the file is missing (a frozen build that
+# did not bundle it). bench/check_categorize.py keeps the two identical.
+DEFAULT_RULES: List[Tuple[str, List[str]]] = [
+    (CATEGORIES[0].name, [
+        r"\bapplication\b", r"\bapply\b", r"\badmission\b", r"\btransfer\b", r"\bentry\b",
+        r"\bdeclaration\b", r"\bmajor\b", r"\bminor\b", r"\bdouble\s+major\b", r"\bprogram\b",
+        r"\bexchange\s+students?\b", r"\binternational\s+students?\b",
+    ]),
+    (CATEGORIES[1].name, [
         r"\benrollment\b", r"\bregistration\b", r"\badd[-\s]?drop\b", r"\bwithdraw(al)?\b",
         r"\btuition\b", r"\bfee\b", r"\bpayment\b", r"\bsubstitution\b",
         r"\bleave\s+of\s+absence\b", r"\bI\s+grades?\b", r"\bconvert(ing)?\b",
         r"\bsingle\s+course\s+exam\s+application\b",
-    ]]),
-    (CATEGORIES[2], [re.compile(p, re.I) for p in [
-        r"\bfirst\s+day\s+of\s+classes\b", r"\blast\s+day\s+of\s+classes\b",
-        r"\binternship\b", r"\bmake[-\s]?up\s+class\b",
-    ]]),
-    (CATEGORIES[3], [re.compile(p, re.I) for p in [
+    ]),
+    (CATEGORIES[2].name, [
+        r"\bfirst\s+day\s+of\s+classes\b", r"\blast\s+day\s+of\s+classes\b", r"\binternship\b",
+        r"\bmake[-\s]?up\s+class\b",
+    ]),
+    (CATEGORIES[3].name, [
         r"\bexam\b", r"\bfinal\b", r"\bmake[-\s]?up\s+exam\b", r"\bassessment\b",
         r"\bgrade\s+submission\b", r"\bresults?\b", r"\bELAE\b",
-    ]]),
-    (CATEGORIES[4], [re.compile(p, re.I) for p in [
+    ]),
+    (CATEGORIES[4].name, [
         r"\borientation\b", r"\bcommencement\b", r"\bceremony\b", r"\bawards?\b",
         r"\bfamily\s+campus\s+day\b", r"\bfest\b",
-    ]]),
-    (CATEGORIES[5], [re.compile(p, re.I) for p in [
-        r"\bholiday\b", r"\bbreak\b", r"\brepublic\b", r"\bvictory\b",
-        r"\bramadan\b", r"\bsacrifice\b", r"\bnew\s+year\b",
-        r"\bdemocracy\b", r"\bnational\s+unity\b", r"\blabou?r\b",
-        r"\byouth\b", r"\bsports\s+day\b",
-    ]]),
+    ]),
+    (CATEGORIES[5].name, [
+        r"\bholiday\b", r"\bbreak\b", r"\brepublic\b", r"\bvictory\b", r"\bramadan\b",
+        r"\bsacrifice\b", r"\bnew\s+year\b", r"\bdemocracy\b", r"\bnational\s+unity\b",
+        r"\blabou?r\b", r"\byouth\b", r"\bsports\s+day\b",
+    ]),
 ]
 
+_BY_NAME: Dict[str, Category] = {c.name: c for c in CATEGORIES}
+
+
+def load_rules(path: Path = RULES_PATH) -> List[Tuple[Category, List[str]]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    rules: List[Tuple[Category, List[str]]] = []
+    for rule in data["rules"]:
+        cat = _BY_NAME.get(rule["category"])
+        if cat is None:
+            raise ValueError(f"Unknown category in {path.name}: {rule['category']!r}")
+        rules.append((cat, list(rule["patterns"])))
+    return rules
+
+
+def compile_rules(rules: List[Tuple[Category, List[str]]]) -> Tuple[re.Pattern, Dict[str, Category]]:
+    # One alternative per category, in priority order: each is a lookahead that searches the
+    # whole title for any of that category's keywords, followed by an empty named group.
+    # Alternation is tried left to right, so the first category with a hit wins, exactly
+    # like checking the categories one by one.
+    alts: List[str] = []
+    groups: Dict[str, Category] = {}
+    for n, (cat, patterns) in enumerate(rules):
+        if not patterns:
+            continue
+        name = f"c{n}"
+        groups[name] = cat
+        alts.append(f"(?=[\\s\\S]*?(?:{'|'.join(f'(?:{p})' for p in patterns)}))(?P<{name}>)")
+    if not alts:
+        return re.compile(r"(?!)"), groups
+    return re.compile("^(?:" + "|".join(alts) + ")", re.I), groups
+
 
+def _startup_rules() -> List[Tuple[Category, List[str]]]:
+    try:
+        return load_rules()
+    except FileNotFoundError:
+        return [(_BY_NAME[name], list(patterns)) for name, patterns in DEFAULT_RULES]
+
+
+_PATTERN, _GROUPS = compile_rules(_startup_rules())
+
+
+@lru_cache(maxsize=4096)
 def categorize(title: str) -> Category:
-    for cat, pats in _KEYWORDS:
-        for pat in pats:
-            if pat.search(title):
-                return cat
-    return FALLBACK
\ No newline at end of file
+    m = _PATTERN.match(title)
+    if m is None:
+        return FALLBACK
+    return _GROUPS[m.lastgroup]
+
+
+def categorize_many(titles: Iterable[str]) -> List[Category]:
+    return [categorize(t) for t in titles]
\ No newline at end of file
@@ -2,19 +2,54 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Tuple
 from zoneinfo import ZoneInfo
 
+from .models import UNDERGRAD
+
 
 @dataclass(frozen=True)
 class AppConfig:
     source_url: str = "https://www.sabanciuniv.edu/en/academic-calendar"
     tz: ZoneInfo = ZoneInfo("Europe/Istanbul")
+    # Further calendar pages (other language, next year, ...) scraped alongside
+    # source_url and merged into one event stream; duplicates keep the first copy
+    extra_sources: Tuple[str, ...] = ()
+    source_timeout: float = 30.0
+    source_workers: int = 4
+    # Same-title rows with different dates: keep_all | first | last | merge (see dedupe.py)
+    duplicate_policy: str = "keep_all"
     target_calendar_name: str = "Sabanci Academic Calendar by canadaaww"
+    # Date columns extracted in the one parse; each program syncs to its own calendar
+    programs: Tuple[str, ...] = (UNDERGRAD,)
 
     tag_key: str = "sac_tag"
     uid_key: str = "sac_uid"
     prev_uids_key: str = "sac_prev"
     src_key: str = "sac_src"
+    fp_key: str = "sac_fp"
     tag_value: str = "1"
 
-    strict_undergrad_only_default: bool = True
\ No newline at end of file
+    strict_undergrad_only_default: bool = True
+
+    # Calendar API write concurrency (worker threads, each with its own service)
+    sync_workers: int = 4
+    sync_max_retries: int = 5
+
+    # remove_all deletes and recreates the calendar (two calls) instead of deleting each
+    # event, when it holds only our events, is not shared and has at least this many
+    recreate_on_remove_all: bool = True
+    recreate_min_events: int = 100
+
+    # Per-run metrics.json + Prometheus textfile in the app data dir
+    metrics_enabled: bool = True
+
+    @property
+    def sources(self) -> Tuple[str, ...]:
+        """All pages to scrape, primary first; the order decides which copy of a duplicate wins."""
+        return tuple(dict.fromkeys((self.source_url, *self.extra_sources)))
+
+    def calendar_name(self, program: str) -> str:
+        if program == UNDERGRAD:
+            return self.target_calendar_name
+        return f"{self.target_calendar_name} ({program})"
\ No newline at end of file
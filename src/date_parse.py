@@ -3,9 +3,8 @@ from __future__ import annotations
 
 import re
 from datetime import date
-from typing import Optional, Tuple
-
-from dateutil import parser as dtparser
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
 
 # Examples supported:
@@ -14,16 +13,57 @@ from dateutil import parser as dtparser
 #  - "03 Aug - 01 Sep 2026"
 #  - "10 Nov - 05 Dec 2025"
 #  - "29 Sep 2025 13 Jan 2026"   (two full dates, no dash)
-RANGE_SAME_MONTH_RE = re.compile(r"^\s*(\d{1,2})\s*-\s*(\d{1,2})\s+([A-Za-z]{3,})\s+(\d{4})\s*$")
-RANGE_DIFF_MONTH_RE = re.compile(r"^\s*(\d{1,2})\s+([A-Za-z]{3,})\s*-\s*(\d{1,2})\s+([A-Za-z]{3,})\s+(\d{4})\s*$")
-SINGLE_DATE_RE = re.compile(r"^\s*(\d{1,2})\s+([A-Za-z]{3,})\s+(\d{4})\s*$")
+
+
+def _month_table() -> Dict[str, int]:
+    # English tokens are exactly the ones dateutil accepts; Turkish short and full names
+    # are listed with and without their Turkish letters.
+    en = [
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ]
+    tr = [
+        ("oca", "ocak"), ("şub", "sub", "şubat", "subat"), ("mar", "mart"), ("nis", "nisan"),
+        ("may", "mayıs", "mayis"), ("haz", "haziran"), ("tem", "temmuz"), ("ağu", "agu", "ağustos", "agustos"),
+        ("eyl", "eylül", "eylul"), ("eki", "ekim"), ("kas", "kasım", "kasim"), ("ara", "aralık", "aralik"),
+    ]
+    table: Dict[str, int] = {}
+    for names in (en, tr):
+        for month, tokens in enumerate(names, start=1):
+            for tok in tokens:
+                table[tok] = month
+    return table
+
+
+MONTHS = _month_table()
+
+# Month tokens may also be Turkish ("11 Tem 2025", "03 Ağustos - 01 Eylül 2026").
+# Only the known non-ASCII Turkish tokens are added, so the regexes accept nothing new
+# that could only fail later in dateutil.
+_TR_TOKENS = {v for t in MONTHS if not t.isascii() for v in (t, t.capitalize(), t.upper())}
+_MON = "(?:[A-Za-z]{3,}|" + "|".join(sorted(_TR_TOKENS, key=lambda t: (-len(t), t))) + ")"
+RANGE_SAME_MONTH_RE = re.compile(rf"^\s*(\d{{1,2}})\s*-\s*(\d{{1,2}})\s+({_MON})\s+(\d{{4}})\s*$")
+RANGE_DIFF_MONTH_RE = re.compile(rf"^\s*(\d{{1,2}})\s+({_MON})\s*-\s*(\d{{1,2}})\s+({_MON})\s+(\d{{4}})\s*$")
+SINGLE_DATE_RE = re.compile(rf"^\s*(\d{{1,2}})\s+({_MON})\s+(\d{{4}})\s*$")
 TWO_FULL_DATES_RE = re.compile(
-    r"^\s*(\d{1,2}\s+[A-Za-z]{3,}\s+\d{4})\s+(\d{1,2}\s+[A-Za-z]{3,}\s+\d{4})\s*$"
+    rf"^\s*(\d{{1,2}}\s+{_MON}\s+\d{{4}})\s+(\d{{1,2}}\s+{_MON}\s+\d{{4}})\s*$"
 )
+_DAY_MON_YEAR_RE = re.compile(rf"^(\d{{1,2}})\s+({_MON})\s+(\d{{4}})$")
+
+_NO_MATCH = object()
 
 
 def _parse_single(d: str) -> date:
-    # English month tokens on the page; dateutil handles them.
+    # Known "DD Mon YYYY" shapes are built directly; dateutil is the last resort.
+    m = _DAY_MON_YEAR_RE.match(d)
+    if m:
+        day, mon, year = m.groups()
+        month = MONTHS.get(mon.lower())
+        if month is not None:
+            return date(int(year), month, int(day))
+    from dateutil import parser as dtparser
+
     return dtparser.parse(d, dayfirst=True, yearfirst=False, fuzzy=False).date()
 
 
@@ -34,6 +74,21 @@ def parse_undergrad_date_cell(text: str) -> Optional[Tuple[date, date]]:
     # Normalize multiple spaces/newlines
     text = " ".join(text.split())
 
+    parsed = _parse_known_formats(text)
+    if parsed is not _NO_MATCH:
+        return parsed
+
+    # Last-resort: try parse as a single date. Not cached: dateutil fills missing
+    # parts (e.g. the day in "Sep 2025") from today's date.
+    try:
+        dt = _parse_single(text)
+        return dt, dt
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_known_formats(text: str):
     m = SINGLE_DATE_RE.match(text)
     if m:
         d = _parse_single(text)
@@ -67,9 +122,4 @@ def parse_undergrad_date_cell(text: str) -> Optional[Tuple[date, date]]:
             return None
         return start, end
 
-    # Last-resort: try parse as a single date
-    try:
-        dt = _parse_single(text)
-        return dt, dt
-    except Exception:
-        return None
\ No newline at end of file
+    return _NO_MATCH
\ No newline at end of file
@@ -0,0 +1,106 @@
+# Made by canadaaww
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from . import metrics
+from .models import ParsedEvent
+from .normalize import compute_uid, normalize_title_for_matching
+
+# What to do with rows whose title repeats with different dates:
+#   keep_all - they are separate events (a term's "Final Exams" every semester)
+#   first    - the first row wins (primary source, earlier table)
+#   last     - the last row wins (a correction further down the page)
+#   merge    - one event spanning all of their dates
+DUPLICATE_POLICIES = ("keep_all", "first", "last", "merge")
+# Policies that never revisit a kept row, so rows can be passed on as they arrive
+STREAMING_POLICIES = ("keep_all", "first")
+
+
+def dedupe_events(events: List[ParsedEvent], logger, policy: str = "keep_all") -> Tuple[List[ParsedEvent], List[str]]:
+    """
+    Drops rows that would map to a uid already seen (same program, dates and
+    normalized title), then applies `policy` to same-title rows with other dates.
+    Order of first appearance is kept. Returns the events and one warning per kind
+    of dropped row.
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy {policy!r}; expected one of {', '.join(DUPLICATE_POLICIES)}")
+
+    warnings: List[str] = []
+    if policy in STREAMING_POLICIES:
+        return list(iter_dedupe_events(events, logger, policy, warnings)), warnings
+
+    unique = list(iter_dedupe_events(events, logger, "keep_all", warnings))
+
+    # Same program and title: index of the row that stands for the whole group
+    slot: Dict[Tuple[str, str], int] = {}
+    out: List[ParsedEvent] = []
+    conflicts = 0
+    for pe in unique:
+        key = (pe.program, normalize_title_for_matching(pe.title_raw))
+        i = slot.get(key)
+        if i is None:
+            slot[key] = len(out)
+            out.append(pe)
+            continue
+        conflicts += 1
+        kept = out[i]
+        if policy == "last":
+            out[i] = pe
+        elif policy == "merge":
+            out[i] = replace(kept, start=min(kept.start, pe.start), end=max(kept.end, pe.end))
+        _log_title_conflict(logger, policy, pe)
+
+    _note_conflicts(warnings, conflicts, policy)
+    return out, warnings
+
+
+def iter_dedupe_events(
+    events: Iterable[ParsedEvent], logger, policy: str, warnings: List[str]
+) -> Iterator[ParsedEvent]:
+    """
+    dedupe_events for the STREAMING_POLICIES as a generator: each row is yielded as
+    soon as it is known to be kept. Warnings are appended to `warnings` once the
+    generator is exhausted.
+    """
+    seen = set()
+    titles = set()
+    exact = conflicts = 0
+    for pe in events:
+        norm = normalize_title_for_matching(pe.title_raw)
+        key = (pe.program, compute_uid(pe.start.isoformat(), pe.end.isoformat(), norm))
+        if key in seen:
+            exact += 1
+            logger.info(
+                "DUPLICATE | %s | %s..%s", pe.title_raw, pe.start, pe.end,
+                extra={"op": "duplicate", "title": pe.title_raw, "start": pe.start, "end": pe.end},
+            )
+            continue
+        seen.add(key)
+        if policy == "first":
+            if (pe.program, norm) in titles:
+                conflicts += 1
+                _log_title_conflict(logger, policy, pe)
+                continue
+            titles.add((pe.program, norm))
+        yield pe
+
+    if exact:
+        metrics.incr("duplicates_dropped", exact, kind="exact")
+        warnings.append(f"Dropped {exact} duplicate row(s) (same title and dates as an earlier row).")
+    _note_conflicts(warnings, conflicts, policy)
+
+
+def _log_title_conflict(logger, policy: str, pe: ParsedEvent) -> None:
+    logger.info(
+        "DUPLICATE (other dates, policy=%s) | %s | %s..%s", policy, pe.title_raw, pe.start, pe.end,
+        extra={"op": "duplicate_title", "title": pe.title_raw, "start": pe.start, "end": pe.end},
+    )
+
+
+def _note_conflicts(warnings: List[str], conflicts: int, policy: str) -> None:
+    if conflicts:
+        metrics.incr("duplicates_dropped", conflicts, kind="title")
+        warnings.append(f"Resolved {conflicts} row(s) repeating a title with other dates (policy={policy}).")
\ No newline at end of file
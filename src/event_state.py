@@ -0,0 +1,85 @@
+# Made by canadaaww
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import AppConfig
+from .google_calendar import SyncTokenExpired, list_events_delta
+from .state_store import load_state, save_state
+
+# Only what the sync engine reads from an existing event is kept in state.json
+_KEPT_FIELDS = ("id", "summary", "start", "end")
+
+
+def _compact(ev: Dict) -> Dict:
+    out = {k: ev[k] for k in _KEPT_FIELDS if k in ev}
+    out["extendedProperties"] = {"private": dict(ev.get("extendedProperties", {}).get("private", {}) or {})}
+    return out
+
+
+def is_ours(cfg: AppConfig, ev: Dict) -> bool:
+    props = ev.get("extendedProperties", {}).get("private", {}) or {}
+    return props.get(cfg.tag_key) == cfg.tag_value and cfg.uid_key in props
+
+
+def _apply_delta(cfg: AppConfig, index: Dict[str, Dict], items: List[Dict]) -> None:
+    for ev in items:
+        ev_id = ev.get("id")
+        if not ev_id:
+            continue
+        if ev.get("status") == "cancelled" or not is_ours(cfg, ev):
+            index.pop(ev_id, None)
+        else:
+            index[ev_id] = _compact(ev)
+
+
+def has_cached_past_events(state_file: Path, today: date) -> Optional[bool]:
+    """
+    Whether the cached listing holds one of our events that ended before today.
+    None when no calendar has been listed yet, so the cache cannot answer.
+    """
+    calendars = load_state(state_file).get("calendars", {})
+    if not any(c.get("sync_token") for c in calendars.values()):
+        return None
+    for cal_state in calendars.values():
+        for ev in cal_state.get("events", {}).values():
+            end_excl = ev.get("end", {}).get("date")
+            if end_excl and date.fromisoformat(end_excl) <= today:
+                return True
+    return False
+
+
+def load_existing_events(cfg: AppConfig, logger, service, calendar_id: str, state_file: Path) -> List[Dict]:
+    """
+    Returns our events on the calendar, reading only the changes since the last
+    run (Calendar API syncToken) and falling back to a full listing on 410 Gone.
+    """
+    state = load_state(state_file)
+    calendars = state.setdefault("calendars", {})
+    cal_state = calendars.get(calendar_id) or {}
+
+    index: Dict[str, Dict] = cal_state.get("events", {})
+    token = cal_state.get("sync_token")
+
+    items: List[Dict] = []
+    next_token = None
+    if token:
+        try:
+            items, next_token = list_events_delta(service, calendar_id, token)
+            logger.info(f"GCAL | Incremental read: {len(items)} changed event(s) since last run")
+        except SyncTokenExpired:
+            logger.info("GCAL | Sync token expired (410); doing a full listing")
+            token = None
+
+    if not token:
+        index = {}
+        items, next_token = list_events_delta(service, calendar_id, None)
+        logger.info(f"GCAL | Full listing: {len(items)} event(s)")
+
+    _apply_delta(cfg, index, items)
+
+    calendars[calendar_id] = {"sync_token": next_token, "events": index}
+    save_state(state_file, state)
+    return list(index.values())
\ No newline at end of file
@@ -0,0 +1,214 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from . import metrics
+from .google_calendar import BATCH_MAX_OPS, AlreadyApplied, execute_batch
+from .models import CalendarOp
+
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+
+def is_rate_limited(err: Optional[Exception]) -> bool:
+    status = getattr(getattr(err, "resp", None), "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+
+    details = getattr(err, "error_details", None)
+    if isinstance(details, list):
+        for d in details:
+            if isinstance(d, dict) and d.get("reason") in RATE_LIMIT_REASONS:
+                return True
+
+    content = getattr(err, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    return any(r in content for r in RATE_LIMIT_REASONS)
+
+
+def _is_server_error(err: Optional[Exception]) -> bool:
+    # A 5xx, or no response at all (connection reset, timeout): the request may not have run
+    if isinstance(err, OSError):
+        return True
+    status = getattr(getattr(err, "resp", None), "status", None)
+    try:
+        return int(status) >= 500
+    except (TypeError, ValueError):
+        return False
+
+
+class AimdLimiter:
+    """Caps in-flight API calls; halves the cap on quota errors and grows it back by ~1 per window."""
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self._max = max(min_limit, max_limit)
+        self._min = min_limit
+        self._limit = float(self._max)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled: bool) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._limit = max(float(self._min), self._limit / 2)
+            else:
+                self._limit = min(float(self._max), self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+
+class ConcurrentExecutor:
+    def __init__(
+        self,
+        service_factory: Callable[[], object],
+        calendar_id: str,
+        logger,
+        workers: int = 4,
+        batch_size: int = BATCH_MAX_OPS,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 32.0,
+    ):
+        self._service_factory = service_factory
+        self._calendar_id = calendar_id
+        self._logger = logger
+        self._workers = max(1, workers)
+        self._batch_size = max(1, min(batch_size, BATCH_MAX_OPS))
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+
+        self._limiter = AimdLimiter(self._workers)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.throttled = 0
+
+    def _service(self):
+        # One service object per worker thread; they all send through the shared pooled session
+        svc = getattr(self._local, "service", None)
+        if svc is None:
+            svc = self._service_factory()
+            self._local.service = svc
+        return svc
+
+    def _backoff(self, attempt: int) -> None:
+        delay = min(self._max_delay, self._base_delay * (2 ** attempt))
+        time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+    def _count(self, retried: bool = False, throttled: bool = False) -> None:
+        with self._lock:
+            self.retries += int(retried)
+            self.throttled += int(throttled)
+        if retried:
+            metrics.incr("api_retries")
+        if throttled:
+            metrics.incr("api_throttled")
+
+    def _retryable(self, err: Optional[Exception], attempt: int) -> bool:
+        if err is None or isinstance(err, AlreadyApplied):
+            return False
+        if is_rate_limited(err):
+            return attempt < self._max_retries
+        # A server error may pass on a second try; any other 4xx would only fail again
+        return _is_server_error(err) and attempt < 1
+
+    def _send(self, ops: List[CalendarOp]) -> List[Optional[Exception]]:
+        self._limiter.acquire()
+        throttled = False
+        try:
+            errors = execute_batch(self._service(), self._calendar_id, ops, self._logger)
+            throttled = any(is_rate_limited(e) for e in errors)
+            self._count(throttled=throttled)
+        finally:
+            self._limiter.release(throttled)
+        return errors
+
+    def _run_chunk(self, chunk: List[CalendarOp]) -> List[Tuple[CalendarOp, Optional[Exception], float]]:
+        t0 = time.monotonic()
+        errors = self._send(chunk)
+        seconds = [time.monotonic() - t0] * len(chunk)
+
+        # Failed ops go out again together, as one smaller batch per round. Inserts carry
+        # their event id, so resending one that was applied despite the error is harmless.
+        attempt = 0
+        while True:
+            pending = [n for n, err in enumerate(errors) if self._retryable(err, attempt)]
+            if not pending:
+                break
+            t1 = time.monotonic()
+            if any(is_rate_limited(errors[n]) for n in pending):
+                self._backoff(attempt)
+            attempt += 1
+            for n in pending:
+                self._count(retried=True)
+                self._logger.warning(f"GCAL | retry {attempt} | {chunk[n].kind} | {chunk[n].label} | {errors[n]}")
+
+            retry_errors = self._send([chunk[n] for n in pending])
+            elapsed = time.monotonic() - t1
+            for n, err in zip(pending, retry_errors):
+                # Only the failed attempt could have applied it, so it is this run's change
+                errors[n] = None if isinstance(err, AlreadyApplied) else err
+                seconds[n] += elapsed
+
+        return list(zip(chunk, errors, seconds))
+
+    def run(self, ops: Iterable[CalendarOp]) -> Iterator[Tuple[CalendarOp, Optional[Exception], float]]:
+        """
+        Sends ops in batches of batch_size and yields (op, error, seconds) in op order;
+        a batch's time is shared by its ops. ops may be a generator: each batch is
+        submitted as soon as it fills, so writes start while later ops are still being
+        planned. At most two batches per worker are pending, so neither the ops nor
+        their results pile up in memory.
+        """
+        pending = deque()
+        done = batches = 0
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            chunk: List[CalendarOp] = []
+            for op in ops:
+                chunk.append(op)
+                if len(chunk) < self._batch_size:
+                    continue
+                pending.append(pool.submit(self._run_chunk, chunk))
+                batches += 1
+                chunk = []
+                if len(pending) >= 2 * self._workers:
+                    results = pending.popleft().result()
+                    done += len(results)
+                    yield from results
+            if chunk:
+                pending.append(pool.submit(self._run_chunk, chunk))
+                batches += 1
+            while pending:
+                results = pending.popleft().result()
+                done += len(results)
+                yield from results
+
+        if batches:
+            self._logger.info(
+                f"GCAL | Executed {done} ops in {batches} batch(es) | workers={self._workers} "
+                f"| retries={self.retries} | throttled={self.throttled} | limit={self._limiter.limit}"
+            )
\ No newline at end of file
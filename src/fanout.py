@@ -0,0 +1,192 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import metrics
+from .config import AppConfig
+from .google_auth import load_saved_credentials
+from .google_calendar import build_calendar_service, ensure_calendar, find_calendar
+from .logger_setup import setup_logger, stop_logging
+from .models import UNDERGRAD
+from .sources import merge_events, scrape_sources
+from .state_store import load_state
+from .sync_engine import DesiredEvent, SyncStats, build_desired, sync
+from .transport import CredentialManager
+
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+# Files next to the tokens that belong to an account rather than being one
+_SIDECAR_SUFFIXES = (".state.json", ".plan.json", "." + metrics.JSON_NAME)
+
+
+@dataclass
+class AccountResult:
+    account: str
+    calendar_ids: Dict[str, str] = field(default_factory=dict)
+    stats: SyncStats = field(default_factory=SyncStats)
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _AccountJob:
+    token_file: Path
+    cfg: AppConfig
+    mode: str
+    strict: bool
+    dry_run: bool
+    today: date
+    parsed_events: Dict[str, list]  # by program
+    desired: Dict[str, List[DesiredEvent]]
+    record_metrics: bool = True
+
+
+def discover_tokens(tokens_dir: Path) -> List[Path]:
+    return sorted(
+        p for p in tokens_dir.glob("*.json")
+        if not any(p.name.endswith(suffix) for suffix in _SIDECAR_SUFFIXES)
+    )
+
+
+def _sidecar(token_file: Path, suffix: str) -> Path:
+    return token_file.with_name(token_file.stem + suffix)
+
+
+def _sync_account(job: _AccountJob) -> AccountResult:
+    # Runs in a worker process: own logger, credentials, service and state per account
+    account = job.token_file.stem
+    logger = setup_logger(_sidecar(job.token_file, ".log"))
+    result = AccountResult(account=account)
+    if job.record_metrics:
+        # The parent's registry does not reach pool workers; each account records its own
+        metrics.start_run()
+    try:
+        with metrics.span("total"):
+            _sync_programs(job, logger, result)
+    except Exception as e:
+        logger.error(f"ERROR | account {account} failed | {e}")
+        result.error = str(e)
+    finally:
+        reg = metrics.stop()
+        if reg is not None:
+            for action in ("created", "updated", "deleted", "skipped", "errors", "already_applied"):
+                reg.incr("events", getattr(result.stats, action), {"action": action})
+            metrics.write_reports(job.token_file.parent, reg, prefix=f"{account}.")
+        # Pool workers exit without running atexit hooks; drain the log queue now
+        stop_logging()
+    return result
+
+
+def _sync_programs(job: _AccountJob, logger, result: AccountResult) -> None:
+    creds = CredentialManager(load_saved_credentials(job.token_file, SCOPES), job.token_file, logger)
+    service = build_calendar_service(creds)
+    state_file = _sidecar(job.token_file, ".state.json")
+    for program in job.cfg.programs:
+        if job.mode in ("remove_past", "remove_all"):
+            # Nothing to remove from a calendar that was never created; do not create it
+            cal_id = find_calendar(service, job.cfg.calendar_name(program), logger, state_file=state_file)
+            if cal_id is None:
+                continue
+        elif job.dry_run:
+            # Planned against an empty calendar when there is none; a dry run creates nothing
+            cal_id = find_calendar(service, job.cfg.calendar_name(program), logger, state_file=state_file)
+        else:
+            cal_id = ensure_calendar(service, job.cfg.calendar_name(program), logger, state_file=state_file)
+        if cal_id is not None:
+            result.calendar_ids[program] = cal_id
+        result.stats.add(sync(
+            cfg=job.cfg,
+            logger=logger,
+            calendar_service=service,
+            calendar_id=cal_id,
+            parsed_events=job.parsed_events.get(program, []),
+            mode=job.mode,
+            strict_undergrad_only=job.strict,
+            dry_run=job.dry_run,
+            service_factory=lambda: build_calendar_service(creds),
+            state_file=state_file,
+            today_ist=job.today,
+            plan_file=_sidecar(job.token_file, ".plan.json" if program == UNDERGRAD else f".{program}.plan.json"),
+            desired=job.desired.get(program, []),
+            calendar_name=job.cfg.calendar_name(program),
+        ))
+        if job.mode == "remove_all":
+            # The calendar may have been recreated under a new id
+            ids = load_state(state_file).get("calendar_ids", {})
+            result.calendar_ids[program] = ids.get(job.cfg.calendar_name(program), cal_id)
+
+
+def fan_out(
+    cfg: AppConfig,
+    logger,
+    tokens_dir: Path,
+    mode: str,
+    strict: bool,
+    dry_run: bool = False,
+    workers: Optional[int] = None,
+    record_metrics: bool = True,
+) -> List[AccountResult]:
+    """
+    Scrapes and builds event bodies once, then syncs every token in tokens_dir in parallel.
+    With record_metrics, each account's metrics go to <account>.metrics.json / .sac_sync.prom.
+    """
+    token_files = discover_tokens(tokens_dir)
+    if not token_files:
+        logger.warning(f"FANOUT | No token files in {tokens_dir}")
+        return []
+
+    today = datetime.now(tz=cfg.tz).date()
+
+    events: Dict[str, list] = {p: [] for p in cfg.programs}
+    desired: Dict[str, List[DesiredEvent]] = {}
+    if mode in ("add_future", "add_future_remove_past"):
+        sources = scrape_sources(
+            cfg.sources, strict, logger,
+            timeout=cfg.source_timeout, workers=cfg.source_workers, programs=cfg.programs,
+        )
+        if all(r.error is not None for r in sources):
+            raise RuntimeError(f"No source page could be scraped: {sources[0].error}")
+        merged, warnings = merge_events(sources, logger, cfg.duplicate_policy)
+        for w in warnings:
+            logger.warning(f"SCRAPE WARNING | {w}")
+        for pe in merged:
+            events[pe.program].append(pe)
+        desired = {p: build_desired(cfg, logger, events[p], today) for p in cfg.programs}
+
+    jobs = [_AccountJob(t, cfg, mode, strict, dry_run, today, events, desired, record_metrics) for t in token_files]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    logger.info(f"FANOUT | accounts={len(jobs)} | workers={workers} | mode={mode} | desired={sum(map(len, desired.values()))}")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_sync_account, jobs))
+
+
+def print_report(results: List[AccountResult]) -> None:
+    total = SyncStats()
+    print("\n================ ACCOUNTS ================")
+    for r in results:
+        s = r.stats
+        status = f"FAILED: {r.error}" if r.error else "ok"
+        print(
+            f"{r.account:<24} added={s.created} updated={s.updated} deleted={s.deleted} "
+            f"skipped={s.skipped} errors={s.errors} | {status}"
+        )
+        for name in ("created", "updated", "deleted", "skipped", "errors", "already_applied", "retries", "throttled"):
+            setattr(total, name, getattr(total, name) + getattr(s, name))
+
+    failed = sum(1 for r in results if r.error)
+    print("================ TOTAL ===================")
+    print(f"Accounts: {len(results)} ({failed} failed)")
+    print(f"Added:    {total.created}")
+    print(f"Updated:  {total.updated}")
+    print(f"Deleted:  {total.deleted}")
+    print(f"Skipped:  {total.skipped}")
+    print(f"Errors:   {total.errors}")
+    print(f"Already applied: {total.already_applied}")
+    print(f"Retries:  {total.retries} ({total.throttled} rate-limited)")
+    print("==========================================")
\ No newline at end of file
@@ -2,21 +2,31 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Sequence
+from typing import TYPE_CHECKING, Sequence
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+from .transport import http_session
+
+# google-auth pulls in requests/urllib3/cryptography; load it only when credentials are needed
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+
+class SignInRequired(RuntimeError):
+    """The saved token is missing, revoked or expired without a refresh token."""
 
 
 def load_credentials(oauth_client_json: Path, token_json: Path, scopes: Sequence[str]) -> Credentials:
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
 
     if token_json.exists():
         creds = Credentials.from_authorized_user_file(str(token_json), scopes=scopes)
 
     if creds and creds.expired and creds.refresh_token:
-        creds.refresh(Request())
+        creds.refresh(Request(session=http_session()))
         token_json.write_text(creds.to_json(), encoding="utf-8")
         return creds
 
@@ -26,4 +36,25 @@ def load_credentials(oauth_client_json: Path, token_json: Path, scopes: Sequence
     flow = InstalledAppFlow.from_client_secrets_file(str(oauth_client_json), scopes=scopes)
     creds = flow.run_local_server(port=0, open_browser=True, authorization_prompt_message="")
     token_json.write_text(creds.to_json(), encoding="utf-8")
+    return creds
+
+
+def load_saved_credentials(token_json: Path, scopes: Sequence[str]) -> Credentials:
+    # Non-interactive variant for unattended runs: never opens a browser.
+    from google.auth.exceptions import RefreshError
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
+    try:
+        creds = Credentials.from_authorized_user_file(str(token_json), scopes=scopes)
+    except (OSError, ValueError) as e:
+        raise SignInRequired(f"No usable saved token at {token_json}: {e}") from e
+    if creds.expired and creds.refresh_token:
+        try:
+            creds.refresh(Request(session=http_session()))
+        except RefreshError as e:
+            raise SignInRequired(f"Saved token was revoked or has expired: {e}") from e
+        token_json.write_text(creds.to_json(), encoding="utf-8")
+    if not creds.valid:
+        raise SignInRequired(f"Token is not valid and cannot be refreshed: {token_json}")
     return creds
\ No newline at end of file
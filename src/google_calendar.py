@@ -2,19 +2,95 @@
 from __future__ import annotations
 
 from datetime import date, timedelta
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from googleapiclient.discovery import build
+from . import metrics
+from .models import CalendarOp
+from .state_store import load_state, save_state
+from .transport import CredentialManager, SessionHttp
+
+# Calendar API accepts at most 50 sub-requests per batch call
+BATCH_MAX_OPS = 50
+
+# Everything the sync engine reads from a listed event (index, fuzzy match, fingerprint)
+EVENT_LIST_FIELDS = "items(id,status,summary,start,end,extendedProperties/private),nextPageToken,nextSyncToken"
 
 
 def build_calendar_service(creds):
-    return build("calendar", "v3", credentials=creds, cache_discovery=False)
+    """
+    Calendar v3 service on the shared pooled session. Pass a CredentialManager to share
+    token refreshes between services; bare credentials get a manager of their own.
+    """
+    from googleapiclient.discovery import build
+
+    manager = creds if isinstance(creds, CredentialManager) else CredentialManager(creds)
+    return build("calendar", "v3", http=SessionHttp(manager), cache_discovery=False)
+
+
+def _cached_calendar_valid(service, calendar_id: str, calendar_name: str, logger) -> bool:
+    from googleapiclient.errors import HttpError
+
+    try:
+        with metrics.api_call("calendars.get"):
+            cal = service.calendars().get(calendarId=calendar_id, fields="id,summary").execute()
+    except HttpError as e:
+        if getattr(e.resp, "status", None) in (404, 410):
+            logger.info(f"CALENDAR | Cached calendar id is gone; rescanning | id={calendar_id}")
+            return False
+        raise
+    if cal.get("summary") != calendar_name:
+        logger.info(f"CALENDAR | Cached calendar was renamed to {cal.get('summary')!r}; rescanning")
+        return False
+    return True
+
+
+def ensure_calendar(service, calendar_name: str, logger, state_file: Optional[Path] = None) -> str:
+    """
+    Returns the id of the calendar named calendar_name, creating it if needed.
+    With state_file, the id is remembered there and validated with one calendars.get
+    on later runs instead of scanning the whole calendarList.
+    """
+    return _resolve_calendar(service, calendar_name, logger, state_file, create=True)
+
+
+def find_calendar(service, calendar_name: str, logger, state_file: Optional[Path] = None) -> Optional[str]:
+    """ensure_calendar for the remove modes: None when there is no such calendar, none is created."""
+    return _resolve_calendar(service, calendar_name, logger, state_file, create=False)
+
+
+def _resolve_calendar(
+    service, calendar_name: str, logger, state_file: Optional[Path], create: bool
+) -> Optional[str]:
+    if state_file is None:
+        return _find_or_create_calendar(service, calendar_name, logger, create)
 
+    state = load_state(state_file)
+    ids = state.setdefault("calendar_ids", {})
+    cached = ids.get(calendar_name)
+    if cached and _cached_calendar_valid(service, cached, calendar_name, logger):
+        logger.info(f"CALENDAR | Using cached calendar id: {calendar_name}")
+        return cached
 
-def ensure_calendar(service, calendar_name: str, logger) -> str:
+    cal_id = _find_or_create_calendar(service, calendar_name, logger, create)
+    if cal_id != cached:
+        # Events listed from the old calendar no longer describe anything we sync to, and
+        # no page counts as synced to the new one (page_state)
+        state.get("calendars", {}).pop(cached, None)
+        state.pop("pages", None)
+    if cal_id is None:
+        ids.pop(calendar_name, None)
+    else:
+        ids[calendar_name] = cal_id
+    save_state(state_file, state)
+    return cal_id
+
+
+def _find_or_create_calendar(service, calendar_name: str, logger, create: bool = True) -> Optional[str]:
     page_token = None
     while True:
-        cal_list = service.calendarList().list(pageToken=page_token, maxResults=250).execute()
+        with metrics.api_call("calendarList.list"):
+            cal_list = service.calendarList().list(pageToken=page_token, maxResults=250).execute()
         for item in cal_list.get("items", []):
             if item.get("summary") == calendar_name:
                 logger.info(f"CALENDAR | Found existing calendar: {calendar_name}")
@@ -23,31 +99,200 @@ def ensure_calendar(service, calendar_name: str, logger) -> str:
         if not page_token:
             break
 
-    created = service.calendars().insert(body={"summary": calendar_name, "timeZone": "Europe/Istanbul"}).execute()
+    if not create:
+        logger.info(f"CALENDAR | No calendar named {calendar_name}")
+        return None
+    return _create_calendar(service, calendar_name, logger)
+
+
+def _create_calendar(service, calendar_name: str, logger) -> str:
+    with metrics.api_call("calendars.insert"):
+        created = service.calendars().insert(body={"summary": calendar_name, "timeZone": "Europe/Istanbul"}).execute()
     logger.info(f"CALENDAR | Created calendar: {calendar_name}")
     return created["id"]
 
 
-def list_events_in_window(service, calendar_id: str, start: date, end: date, logger) -> List[Dict]:
-    time_min = f"{start.isoformat()}T00:00:00+03:00"
-    time_max = f"{(end + timedelta(days=1)).isoformat()}T00:00:00+03:00"
+def calendar_is_shared(service, calendar_id: str, logger) -> bool:
+    """
+    Whether anyone besides the owner has access. When the ACL cannot be read the
+    answer is True, so callers err on the side of keeping the calendar.
+    """
+    from googleapiclient.errors import HttpError
+
+    try:
+        with metrics.api_call("acl.list"):
+            rules = service.acl().list(calendarId=calendar_id, fields="items(role,scope)").execute().get("items", [])
+    except HttpError as e:
+        logger.warning(f"CALENDAR | Could not read sharing settings | {e}")
+        return True
+    owners = sum(1 for r in rules if r.get("role") == "owner")
+    return owners > 1 or any(r.get("role") not in ("owner", "none") for r in rules)
+
+
+def recreate_calendar(service, calendar_id: str, calendar_name: str, logger, state_file: Optional[Path] = None) -> str:
+    """
+    Deletes the calendar, and every event on it, in one call and creates an empty one
+    with the same name. The cached id and listing in state_file move to the new calendar.
+    """
+    with metrics.api_call("calendars.delete"):
+        service.calendars().delete(calendarId=calendar_id).execute()
+    logger.info(f"CALENDAR | Deleted calendar: {calendar_name} | id={calendar_id}")
+
+    # Straight to insert: calendarList can still show the deleted calendar for a while
+    new_id = _create_calendar(service, calendar_name, logger)
+    if state_file is not None:
+        state = load_state(state_file)
+        state.get("calendars", {}).pop(calendar_id, None)
+        state.pop("pages", None)
+        state.setdefault("calendar_ids", {})[calendar_name] = new_id
+        save_state(state_file, state)
+    return new_id
+
+
+def _day_start(d: date) -> str:
+    return f"{d.isoformat()}T00:00:00+03:00"
+
+
+def iter_events_in_window(
+    service,
+    calendar_id: str,
+    start: Optional[date],
+    end: Optional[date],
+    private_props: Optional[Dict[str, str]] = None,
+    fields: str = EVENT_LIST_FIELDS,
+) -> Iterator[Dict]:
+    """
+    Streams events overlapping start..end (inclusive dates; None leaves that side open),
+    following nextPageToken. private_props filters server-side on private extendedProperties.
+    """
+    kwargs = dict(calendarId=calendar_id, singleEvents=True, showDeleted=False, maxResults=2500, fields=fields)
+    if start is not None:
+        kwargs["timeMin"] = _day_start(start)
+    if end is not None:
+        kwargs["timeMax"] = _day_start(end + timedelta(days=1))
+    if private_props:
+        kwargs["privateExtendedProperty"] = [f"{k}={v}" for k, v in private_props.items()]
+
+    page_token = None
+    while True:
+        with metrics.api_call("events.list"):
+            resp = service.events().list(pageToken=page_token, **kwargs).execute()
+        yield from resp.get("items", [])
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            break
+
+
+def list_events_in_window(
+    service,
+    calendar_id: str,
+    start: Optional[date],
+    end: Optional[date],
+    logger,
+    private_props: Optional[Dict[str, str]] = None,
+) -> List[Dict]:
+    out = list(iter_events_in_window(service, calendar_id, start, end, private_props=private_props))
+    logger.info(f"GCAL | Listed {len(out)} events in window {start or '-inf'}..{end or '+inf'}")
+    return out
+
+
+class SyncTokenExpired(Exception):
+    pass
+
+
+class AlreadyApplied(Exception):
+    """An op whose only error says an earlier send of it went through (see _already_applied)."""
+
+
+def list_events_delta(service, calendar_id: str, sync_token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+    """
+    With sync_token=None this is a full listing; otherwise only events changed since
+    the token (deleted ones come back with status="cancelled"). Returns the items and
+    the nextSyncToken. Time bounds can't be combined with sync tokens, so neither
+    call sets timeMin/timeMax.
+    """
+    from googleapiclient.errors import HttpError
 
     out: List[Dict] = []
     page_token = None
     while True:
-        resp = service.events().list(
+        kwargs = dict(
             calendarId=calendar_id,
-            timeMin=time_min,
-            timeMax=time_max,
             singleEvents=True,
-            showDeleted=False,
             maxResults=2500,
             pageToken=page_token,
-        ).execute()
+            fields=EVENT_LIST_FIELDS,
+        )
+        if sync_token:
+            kwargs["syncToken"] = sync_token
+        else:
+            kwargs["showDeleted"] = False
+        try:
+            with metrics.api_call("events.list"):
+                resp = service.events().list(**kwargs).execute()
+        except HttpError as e:
+            if sync_token and getattr(e.resp, "status", None) == 410:
+                raise SyncTokenExpired(str(e)) from e
+            raise
         out.extend(resp.get("items", []))
         page_token = resp.get("nextPageToken")
         if not page_token:
-            break
+            return out, resp.get("nextSyncToken")
+
+
+def build_op_request(service, calendar_id: str, op: CalendarOp):
+    events = service.events()
+    if op.kind == "insert":
+        # A preset id makes the insert idempotent: sending it again gets 409 instead of a copy
+        body = dict(op.body, id=op.event_id) if op.event_id else op.body
+        return events.insert(calendarId=calendar_id, body=body)
+    if op.kind == "patch":
+        return events.patch(calendarId=calendar_id, eventId=op.event_id, body=op.body)
+    if op.kind == "delete":
+        return events.delete(calendarId=calendar_id, eventId=op.event_id)
+    raise ValueError(f"Unknown calendar op kind: {op.kind}")
+
+
+def execute_batch(service, calendar_id: str, ops: List[CalendarOp], logger) -> List[Optional[Exception]]:
+    """
+    Runs up to BATCH_MAX_OPS ops as one batch call; returns one error (or None) per op.
+    An op that had already been applied gets an AlreadyApplied error.
+    """
+    outcome: Dict[str, Optional[Exception]] = {}
+
+    def _on_response(request_id, response, exception):
+        outcome[request_id] = exception
+
+    batch = service.new_batch_http_request(callback=_on_response)
+    for n, op in enumerate(ops):
+        batch.add(build_op_request(service, calendar_id, op), request_id=str(n))
+
+    for op in ops:
+        metrics.incr("api_batched_ops", method=f"events.{op.kind}")
+    try:
+        with metrics.api_call("batch"):
+            batch.execute()
+    except Exception as e:
+        logger.warning(f"GCAL | batch of {len(ops)} ops failed as a whole | {e}")
+        return [e] * len(ops)
+
+    missing = RuntimeError("No response for batch sub-request")
+    errors = [outcome.get(str(n), missing) for n in range(len(ops))]
+    for n, (op, err) in enumerate(zip(ops, errors)):
+        if _already_applied(op, err):
+            logger.info(f"GCAL | {op.kind} already applied | {op.label} | id={op.event_id}")
+            errors[n] = AlreadyApplied(str(err))
+    return errors
+
 
-    logger.info(f"GCAL | Listed {len(out)} events in window {start}..{end}")
-    return out
\ No newline at end of file
+def _already_applied(op: CalendarOp, err: Optional[Exception]) -> bool:
+    """
+    Whether err only says that an earlier attempt of op went through: our preset id is
+    taken (409 on insert) or the event is already gone (404/410 on delete).
+    """
+    status = getattr(getattr(err, "resp", None), "status", None)
+    if op.kind == "insert":
+        return bool(op.event_id) and status == 409
+    if op.kind == "delete":
+        return status in (404, 410)
+    return False
\ No newline at end of file
@@ -0,0 +1,252 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import date, datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .categorize import categorize
+from .config import AppConfig
+from .models import UNDERGRAD
+from .sync_engine import DesiredEvent, build_desired
+
+PRODID = "-//canadaaww//Sabanci Academic Calendar Sync//EN"
+UID_DOMAIN = "sabanci-academic-calendar-sync"
+HASH_PROP = "X-SAC-CONTENT-HASH"
+# Lines that change on every write; the content hash leaves them out
+_VOLATILE = ("DTSTAMP:",)
+
+
+def feed_name(program: str) -> str:
+    return "calendar.ics" if program == UNDERGRAD else f"calendar.{program}.ics"
+
+
+def _escape(text: str) -> str:
+    # RFC 5545 3.3.11 TEXT
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    # Content lines are at most 75 octets; continuation lines start with a space
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts: List[str] = []
+    limit = 75
+    while raw:
+        cut = min(limit, len(raw))
+        # Never split a UTF-8 sequence
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(raw[:cut].decode("utf-8"))
+        raw = raw[cut:]
+        limit = 74
+    return "\r\n ".join(parts)
+
+
+def _ics_date(iso: str) -> str:
+    return iso.replace("-", "")
+
+
+def _vevent(d: DesiredEvent, dtstamp: str) -> List[str]:
+    body = d.body
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{d.uid}@{UID_DOMAIN}",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART;VALUE=DATE:{_ics_date(d.start_s)}",
+        f"DTEND;VALUE=DATE:{_ics_date(d.end_excl_s)}",
+        f"SUMMARY:{_escape(body['summary'])}",
+        f"DESCRIPTION:{_escape(body.get('description', ''))}",
+        f"CATEGORIES:{_escape(categorize(d.title_raw).name)}",
+        "TRANSP:TRANSPARENT",
+    ]
+    for r in body.get("reminders", {}).get("overrides", []):
+        lines += [
+            "BEGIN:VALARM",
+            "ACTION:DISPLAY",
+            f"TRIGGER:-PT{int(r['minutes'])}M",
+            f"DESCRIPTION:{_escape(body['summary'])}",
+            "END:VALARM",
+        ]
+    lines.append("END:VEVENT")
+    return lines
+
+
+def render_ics(cfg: AppConfig, program: str, desired: List[DesiredEvent]) -> Tuple[str, str]:
+    """Returns (ics text, content hash). The hash ignores DTSTAMP, so equal events give equal hashes."""
+    dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    events: List[str] = []
+    for d in sorted((d for d in desired if d.body is not None), key=lambda d: (d.start_s, d.uid)):
+        events += _vevent(d, dtstamp)
+
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(cfg.calendar_name(program))}",
+        f"X-WR-TIMEZONE:{cfg.tz.key}",
+    ]
+    h = hashlib.sha256()
+    for line in header + events:
+        if not line.startswith(_VOLATILE):
+            h.update(line.encode("utf-8") + b"\n")
+    digest = h.hexdigest()[:32]
+
+    lines = header + [f"{HASH_PROP}:{digest}"] + events + ["END:VCALENDAR"]
+    return "".join(_fold(line) + "\r\n" for line in lines), digest
+
+
+def stored_hash(path: Path) -> Optional[str]:
+    """The content hash of an existing feed file, read from its header."""
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            for line in f:
+                if line.startswith(HASH_PROP + ":"):
+                    return line[len(HASH_PROP) + 1:].strip()
+                if line.startswith("BEGIN:VEVENT"):
+                    break
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def write_feed(path: Path, text: str, digest: str) -> bool:
+    """Writes the feed unless the file already has this content; returns whether it was written."""
+    if stored_hash(path) == digest:
+        return False
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    # Readers (the feed server, sync clients on a shared folder) never see a partial file
+    os.replace(tmp, path)
+    return True
+
+
+def export_feeds(cfg: AppConfig, logger, parsed_events: List, directory: Path) -> Dict[str, Path]:
+    """One .ics file per program with every scraped event, past ones included."""
+    by_program: Dict[str, list] = {p: [] for p in cfg.programs}
+    for pe in parsed_events:
+        by_program[pe.program].append(pe)
+
+    out: Dict[str, Path] = {}
+    for program, events in by_program.items():
+        path = directory / feed_name(program)
+        text, digest = render_ics(cfg, program, build_desired(cfg, logger, events, date.min))
+        if write_feed(path, text, digest):
+            logger.info(f"FEED | Wrote {path.name} | events={len(events)} | hash={digest}")
+        else:
+            logger.info(f"FEED | {path.name} unchanged | hash={digest}")
+        out[program] = path
+    return out
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    server: "FeedServer"
+    server_version = "SabanciCalendarFeed/1.0"
+
+    def do_HEAD(self) -> None:
+        self._serve(head=True)
+
+    def do_GET(self) -> None:
+        self._serve(head=False)
+
+    def _serve(self, head: bool) -> None:
+        name = self.path.split("?", 1)[0].rsplit("/", 1)[-1] or feed_name(UNDERGRAD)
+        entry = self.server.load(name)
+        if entry is None:
+            self.send_error(404)
+            return
+        content, etag, mtime = entry
+
+        if self._not_modified(etag, mtime):
+            self.send_response(304)
+            self._validators(etag, mtime)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/calendar; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self._validators(etag, mtime)
+        self.end_headers()
+        if not head:
+            self.wfile.write(content)
+
+    def _validators(self, etag: str, mtime: float) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.send_header("Cache-Control", f"max-age={self.server.max_age}")
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            # Weak comparison (RFC 9110 13.1.2) is what GET revalidation uses
+            tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+            return "*" in tags or etag in tags
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, format: str, *args) -> None:
+        self.server.logger.debug("FEED | %s | " + format, self.address_string(), *args)
+
+
+class FeedServer(ThreadingHTTPServer):
+    """
+    Serves the feeds of `programs` from one directory. The ETag is the feed's content
+    hash, so a client polling an unchanged feed gets a bodyless 304. Files are re-read
+    only when their mtime or size changes.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        directory: Path,
+        host: str,
+        port: int,
+        logger,
+        max_age: int = 900,
+        programs: Sequence[str] = (UNDERGRAD,),
+    ):
+        super().__init__((host, port), _FeedHandler)
+        self.directory = directory
+        self.logger = logger
+        self.max_age = max_age
+        # The directory also holds the token and state files. Only these exact names are
+        # served, so "..", backslashes or drive letters in a request never reach the disk.
+        self.names = frozenset(feed_name(p) for p in programs)
+        self._cache: Dict[str, Tuple[Tuple[int, int], bytes, str, float]] = {}
+
+    def load(self, name: str) -> Optional[Tuple[bytes, str, float]]:
+        if name not in self.names:
+            return None
+        path = self.directory / name
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(name)
+        if cached is None or cached[0] != key:
+            content = path.read_bytes()
+            digest = stored_hash(path) or hashlib.sha256(content).hexdigest()[:32]
+            cached = self._cache[name] = (key, content, f'"{digest}"', st.st_mtime)
+        return cached[1], cached[2], cached[3]
\ No newline at end of file
@@ -0,0 +1,80 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List
+
+_PREFIX = "import time:"
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportTiming]:
+    """Parses `python -X importtime` stderr lines; anything else is ignored."""
+    out: List[ImportTiming] = []
+    for line in lines:
+        if not line.startswith(_PREFIX):
+            continue
+        parts = line[len(_PREFIX):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cum_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # the header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        out.append(ImportTiming(name.strip(), depth, self_us, cum_us))
+    return out
+
+
+def print_import_report(timings: List[ImportTiming], top: int = 20) -> None:
+    top_level = [t for t in timings if t.depth == 0]
+    total_us = sum(t.cumulative_us for t in top_level)
+
+    print("\n============ IMPORT PROFILE ============")
+    print(f"Modules imported: {len(timings)}")
+    print(f"Total import time: {total_us / 1000:.1f} ms")
+    print("\nSlowest top-level imports (cumulative):")
+    for t in sorted(top_level, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        print(f"  {t.cumulative_us / 1000:8.1f} ms  {t.module}")
+    print("\nSlowest modules (self):")
+    for t in sorted(timings, key=lambda t: t.self_us, reverse=True)[:top]:
+        print(f"  {t.self_us / 1000:8.1f} ms  {t.module}")
+    print("========================================")
+
+
+def run_profiled(argv: List[str]) -> int:
+    """
+    Re-runs the app under `-X importtime` with the same arguments, passes its own
+    stderr through, and prints where startup time went once it exits.
+    """
+    if getattr(sys, "frozen", False):
+        # The PyInstaller bootloader does not accept interpreter -X options
+        print("ERROR: --profile-imports needs the source checkout (python -m src.main).")
+        return 2
+
+    cmd = [sys.executable, "-X", "importtime", "-m", "src.main", *argv]
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    root = Path(__file__).resolve().parents[1]
+    lines: List[str] = []
+    proc = subprocess.Popen(cmd, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace", env=env, cwd=root)
+    for line in proc.stderr:
+        if line.startswith(_PREFIX):
+            lines.append(line)
+        else:
+            sys.stderr.write(line)
+    code = proc.wait()
+
+    print_import_report(parse_importtime(lines))
+    return code
\ No newline at end of file
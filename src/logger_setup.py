@@ -1,15 +1,130 @@
 # Made by canadaaww
 from __future__ import annotations
 
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from collections import Counter
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import List, Optional
 
+# Structured fields per-event lines pass via extra=...; the JSON-lines output keeps them
+EVENT_FIELDS = ("op", "uid", "event_id", "title", "start", "end", "program", "latency_ms", "error")
+
+_listener: Optional[QueueListener] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues the record as is. The stock QueueHandler formats the message in the
+    calling thread; here that is left to the listener thread as well.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Traceback objects must not outlive the frame they belong to
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        for name in EVENT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                out[name] = value
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class SummarizingHandler(logging.Handler):
+    """
+    Quiet mode: per-event records (those with an `op` field) are counted instead of
+    written, and each run of them collapses into one "EVENTS | create=12 | skip=40"
+    line, emitted before the next ordinary record.
+    """
+
+    def __init__(self, targets: List[logging.Handler]):
+        super().__init__()
+        self.targets = targets
+        self._counts: Counter = Counter()
+        self._last: Optional[logging.LogRecord] = None
+
+    def _forward(self, record: logging.LogRecord) -> None:
+        for h in self.targets:
+            if record.levelno >= h.level:
+                h.handle(record)
+
+    def flush(self) -> None:
+        if self._counts:
+            summary = " | ".join(f"{op}={n}" for op, n in self._counts.items())
+            self._counts.clear()
+            # Stamped with the last summarized event so the file stays in time order
+            self._forward(logging.makeLogRecord({
+                "name": self._last.name,
+                "levelno": logging.INFO,
+                "levelname": "INFO",
+                "msg": f"EVENTS | {summary}",
+                "created": self._last.created,
+                "msecs": self._last.msecs,
+            }))
+        for h in self.targets:
+            h.flush()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        op = getattr(record, "op", None)
+        if op is not None and record.levelno < logging.WARNING:
+            self._counts[op] += 1
+            self._last = record
+            return
+        self.flush()
+        self._forward(record)
+
+    def close(self) -> None:
+        self.flush()
+        for h in self.targets:
+            h.close()
+        super().close()
+
+
+def stop_logging() -> None:
+    """Drains the queue and stops the writer thread; safe to call more than once."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for h in listener.handlers:
+            h.close()
+
+
+def setup_logger(
+    log_file: Path,
+    json_file: Optional[Path] = None,
+    quiet: bool = False,
+    background: bool = True,
+) -> logging.Logger:
+    """
+    File + console logging, optionally with a JSON-lines file that keeps per-event
+    fields. With background=True, records go through a queue and are formatted and
+    written on a listener thread, off the scrape/sync hot path.
+    """
+    global _listener
+    stop_logging()
 
-def setup_logger(log_file: Path) -> logging.Logger:
     logger = logging.getLogger("sac_sync")
-    logger.setLevel(logging.INFO)
     logger.handlers.clear()
+    # Per-event apply results (with latencies) are DEBUG; only the JSON output wants them
+    logger.setLevel(logging.DEBUG if json_file else logging.INFO)
 
     fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
 
@@ -21,6 +136,27 @@ def setup_logger(log_file: Path) -> logging.Logger:
     sh.setFormatter(fmt)
     sh.setLevel(logging.INFO)
 
-    logger.addHandler(fh)
-    logger.addHandler(sh)
-    return logger
\ No newline at end of file
+    handlers: List[logging.Handler] = [fh, sh]
+    if quiet:
+        summarizer = SummarizingHandler(handlers)
+        summarizer.setLevel(logging.INFO)
+        handlers = [summarizer]
+
+    if json_file is not None:
+        jh = RotatingFileHandler(json_file, maxBytes=10_000_000, backupCount=3, encoding="utf-8")
+        jh.setFormatter(JsonLinesFormatter())
+        jh.setLevel(logging.DEBUG)
+        handlers.append(jh)
+
+    if not background:
+        for h in handlers:
+            logger.addHandler(h)
+        return logger
+
+    _listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(_DeferredQueueHandler(_listener.queue))
+    return logger
+
+
+atexit.register(stop_logging)
\ No newline at end of file
@@ -1,19 +1,120 @@
 # Made by canadaaww
 from __future__ import annotations
 
+import argparse
+import random
 import sys
+import threading
+import time
+from dataclasses import dataclass, replace
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-from .app_paths import log_path, token_path
+from . import metrics
+from .app_paths import app_data_dir, lock_path, log_json_path, log_path, plan_path, state_path, token_path
 from .config import AppConfig
-from .google_auth import load_credentials
-from .google_calendar import build_calendar_service, ensure_calendar
+from .dedupe import STREAMING_POLICIES
+from .event_state import has_cached_past_events
+from .google_auth import SignInRequired, load_credentials, load_saved_credentials
+from .google_calendar import build_calendar_service, ensure_calendar, find_calendar
 from .logger_setup import setup_logger
-from .scraper import scrape_undergrad_events
-from .sync_engine import sync
+from .models import UNDERGRAD
+from .page_state import forget_page, mark_page_synced, sync_target
+from .run_lock import LockBusy, RunLock
+from .scraper import program_column
+from .sources import iter_source_events, merge_events, scrape_sources
+from .sync_engine import PlanRejected, SyncStats, apply_plan, read_plan, sync, write_plan
+from .transport import CredentialManager
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
+ADD_MODES = ("add_future", "add_future_remove_past")
+MODES = ("add_future", "add_future_remove_past", "remove_past", "remove_all")
+REMOVE_MODES = ("remove_past", "remove_all")
+
+
+@dataclass(frozen=True)
+class RunOptions:
+    mode: str
+    strict: bool
+    dry_run: bool = False
+    metrics: bool = True
+    # Ask Google whether the cached calendars still exist even when no page changed;
+    # otherwise an unchanged run trusts state.json and never loads the Google libraries
+    verify_calendars: bool = False
+
+
+class Session:
+    """
+    Credentials, Calendar service and calendar id, built on first use and reused
+    across runs. A run that never touches the calendar never imports the Google libraries.
+    With interactive=False a missing or revoked token raises SignInRequired instead of
+    opening the browser sign-in.
+    """
+
+    def __init__(
+        self,
+        cfg: AppConfig,
+        logger,
+        oauth_json: Path,
+        background_refresh: bool = False,
+        interactive: bool = True,
+    ):
+        self.cfg = cfg
+        self.logger = logger
+        self.oauth_json = oauth_json
+        self.background_refresh = background_refresh
+        self.interactive = interactive
+        self._creds: Optional[CredentialManager] = None
+        self._service = None
+        self._calendar_ids: Dict[str, str] = {}
+
+    @property
+    def creds(self) -> CredentialManager:
+        if self._creds is None:
+            if self.interactive:
+                creds = load_credentials(self.oauth_json, token_path(), SCOPES)
+            else:
+                creds = load_saved_credentials(token_path(), SCOPES)
+            self._creds = CredentialManager(creds, token_path(), self.logger)
+            if self.background_refresh:
+                self._creds.start()
+        return self._creds
+
+    @property
+    def service(self):
+        if self._service is None:
+            self._service = build_calendar_service(self.creds)
+        return self._service
+
+    def calendar_id(self, program: str = UNDERGRAD) -> str:
+        cal_id = self._calendar_ids.get(program)
+        if cal_id is None:
+            cal_id = self._calendar_ids[program] = ensure_calendar(
+                self.service, self.cfg.calendar_name(program), self.logger, state_file=state_path()
+            )
+        return cal_id
+
+    def existing_calendar_id(self, program: str = UNDERGRAD) -> Optional[str]:
+        # For removing: a program that was never synced has no calendar, and gets none
+        cal_id = self._calendar_ids.get(program)
+        if cal_id is None:
+            cal_id = find_calendar(self.service, self.cfg.calendar_name(program), self.logger, state_file=state_path())
+            if cal_id is not None:
+                self._calendar_ids[program] = cal_id
+        return cal_id
+
+    def forget_calendar(self, program: str = UNDERGRAD) -> None:
+        # The id changed (remove_all recreated the calendar) or may be stale; re-read it on next use
+        self._calendar_ids.pop(program, None)
+
+    def new_service(self):
+        return build_calendar_service(self.creds)
+
+    def sync_target(self) -> Optional[Dict]:
+        # Account and calendars as last saved to disk; see page_state.sync_target
+        names = [self.cfg.calendar_name(p) for p in self.cfg.programs]
+        return sync_target(state_path(), token_path(), names)
 
 
 def istanbul_today(cfg: AppConfig):
@@ -29,6 +130,11 @@ def ask_strictness(cfg: AppConfig) -> bool:
     return ans == "Y"
 
 
+def ask_dry_run() -> bool:
+    print("\nDry run? Only compute and save the plan, change nothing. (Y/N) [default N]")
+    return input("> ").strip().upper() == "Y"
+
+
 def menu() -> str:
     print("\nChoose an operation:")
     print("1) Add all future events (including today)")
@@ -39,20 +145,12 @@ def menu() -> str:
     return input("> ").strip()
 
 
-def main():
-    cfg = AppConfig()
-    logger = setup_logger(log_path())
-
-    print("===============================================")
-    print(" Sabanci Academic Calendar Sync (UNDER G.)")
-    print(" Made by canadaaww")
-    print("===============================================")
-
+def ask_options(cfg: AppConfig) -> Optional[RunOptions]:
     strict = ask_strictness(cfg)
 
     choice = menu()
     if choice == "0":
-        return
+        return None
 
     mode_map = {
         "1": "add_future",
@@ -62,59 +160,481 @@ def main():
     }
     if choice not in mode_map:
         print("Invalid choice.")
-        return
+        return None
 
     mode = mode_map[choice]
+    dry_run = ask_dry_run()
 
-    if mode == "remove_all":
+    if mode == "remove_all" and not dry_run:
         print("\nCONFIRM: This will delete ALL events created by this app from the dedicated calendar.")
         print("Type DELETE to confirm:")
         conf = input("> ").strip()
         if conf != "DELETE":
             print("Cancelled.")
-            return
+            return None
+
+    return RunOptions(mode=mode, strict=strict, dry_run=dry_run)
 
-    oauth_json = Path(__file__).resolve().parents[1] / "assets" / "oauth_client.json"
-    if not oauth_json.exists():
-        print("ERROR: Missing assets/oauth_client.json")
-        print("You must place your downloaded Desktop OAuth client JSON there.")
-        return
 
-    creds = load_credentials(oauth_json, token_path(), SCOPES)
-    service = build_calendar_service(creds)
-    cal_id = ensure_calendar(service, cfg.target_calendar_name, logger)
+def run_once(session: Session, opts: RunOptions) -> SyncStats:
+    cfg, logger = session.cfg, session.logger
 
     today = istanbul_today(cfg)
     logger.info(f"TIME | Istanbul today={today.isoformat()}")
 
-    # Scrape every run for correctness
-    events, warnings = scrape_undergrad_events(cfg.source_url, strict_undergrad_only=strict, logger=logger)
+    # Scrape only when a source page changed since the last successful sync;
+    # the date-based removal part of a mode still runs either way.
+    sync_mode = opts.mode
+    events, warnings = [], []
+    sources = []
+    unchanged = False
+    # A single page whose duplicates can be dropped as they come is never held as an
+    # event list: each program's events are extracted while they are being synced
+    stream = len(cfg.sources) == 1 and cfg.duplicate_policy in STREAMING_POLICIES
+    if opts.mode in ADD_MODES:
+        target = session.sync_target()
+        sources = scrape_sources(
+            cfg.sources, opts.strict, logger,
+            timeout=cfg.source_timeout, workers=cfg.source_workers, state_file=state_path(), programs=cfg.programs,
+            target=target, extract=not stream,
+        )
+        if all(r.error is not None for r in sources):
+            raise RuntimeError(f"No source page could be scraped: {sources[0].error}")
+        unchanged = all(r.unchanged for r in sources)
+        # check_page already compared the account and cached calendar ids (sync_target)
+        # offline. Only the daemon also asks Google whether those calendars still exist:
+        # ensure_calendar checks them, and when it has to create or pick another calendar
+        # it forgets the synced pages, so everything is scraped again for the new one.
+        if unchanged and opts.verify_calendars:
+            for program in cfg.programs:
+                session.calendar_id(program)
+            if session.sync_target() != target:
+                logger.info("SCRAPE | Calendar changed since the last sync; scraping again")
+                sources = scrape_sources(
+                    cfg.sources, opts.strict, logger,
+                    timeout=cfg.source_timeout, workers=cfg.source_workers, state_file=state_path(),
+                    programs=cfg.programs, target=session.sync_target(), extract=not stream,
+                )
+                unchanged = all(r.unchanged for r in sources)
+        if unchanged:
+            sync_mode = "remove_past" if opts.mode == "add_future_remove_past" else None
+            logger.info(f"SCRAPE | Pages unchanged; skipping parse/categorize/diff | mode={sync_mode or 'none'}")
+        elif not stream:
+            events, warnings = merge_events(sources, logger, cfg.duplicate_policy)
+            if len(sources) > 1:
+                logger.info(f"SCRAPE | sources={len(sources)} | events={len(events)}")
     for w in warnings:
         logger.warning(f"SCRAPE WARNING | {w}")
 
-    stats = sync(
-        cfg=cfg,
-        logger=logger,
-        calendar_service=service,
-        calendar_id=cal_id,
-        parsed_events=events,
-        mode=mode,
-        strict_undergrad_only=strict,
-        dry_run=False,
+    if sync_mode == "remove_past" and unchanged:
+        if has_cached_past_events(state_path(), today) is False:
+            sync_mode = None
+            logger.info("SYNC | No past events in the cached listing; nothing to remove")
+
+    # One calendar per program, each diffed against its own share of the events
+    by_program: Dict[str, list] = {p: [] for p in cfg.programs}
+    for pe in events:
+        by_program[pe.program].append(pe)
+
+    stream = stream and sync_mode in ADD_MODES
+    stats = SyncStats()
+    if sync_mode is not None:
+        for program in cfg.programs:
+            if sync_mode in REMOVE_MODES:
+                calendar_id = session.existing_calendar_id(program)
+                if calendar_id is None:
+                    logger.info(f"SYNC | program={program} | no calendar; nothing to remove")
+                    continue
+            elif opts.dry_run:
+                # A dry run must not create the calendar; plan against an empty one instead
+                calendar_id = session.existing_calendar_id(program)
+                if calendar_id is None:
+                    logger.info(f"SYNC | program={program} | no calendar yet; planning every event as an insert")
+            else:
+                calendar_id = session.calendar_id(program)
+            if stream:
+                parsed_events = iter_source_events(
+                    sources[0], opts.strict, logger, program, cfg.duplicate_policy, warnings
+                )
+            else:
+                parsed_events = by_program[program]
+            if len(cfg.programs) > 1:
+                count = "streamed" if stream else len(parsed_events)
+                logger.info(f"SYNC | program={program} | events={count}")
+            stats.add(sync(
+                cfg=cfg,
+                logger=logger,
+                calendar_service=session.service,
+                calendar_id=calendar_id,
+                parsed_events=parsed_events,
+                mode=sync_mode,
+                strict_undergrad_only=opts.strict,
+                dry_run=opts.dry_run,
+                service_factory=session.new_service,
+                state_file=state_path(),
+                today_ist=today,
+                plan_file=plan_path("" if program == UNDERGRAD else program),
+                calendar_name=cfg.calendar_name(program),
+            ))
+            if sync_mode == "remove_all":
+                session.forget_calendar(program)
+    if stream:
+        # Complete only now that every program's events have been extracted
+        for w in warnings:
+            logger.warning(f"SCRAPE WARNING | {w}")
+
+    if not opts.dry_run:
+        if sources and stats.errors == 0:
+            target = session.sync_target()
+            for r in sources:
+                if r.check is not None and r.error is None:
+                    mark_page_synced(state_path(), r.check, opts.strict, cfg.programs, target)
+        elif opts.mode == "remove_all":
+            # Our events are gone, so the next add run must not short-circuit on an unchanged page
+            for url in cfg.sources:
+                forget_page(state_path(), url)
+
+    return stats
+
+
+def apply_saved_plan(session: Session, path: Path) -> SyncStats:
+    """
+    --apply-plan: sends a plan saved by a dry run without planning again. The plan must
+    have been computed today (Istanbul date) for a calendar this config still syncs to.
+    """
+    cfg, logger = session.cfg, session.logger
+    try:
+        plan = read_plan(path)
+    except (OSError, ValueError, TypeError) as e:
+        raise PlanRejected(f"Cannot read plan {path}: {e}") from e
+
+    if plan.applied:
+        raise PlanRejected(f"Plan {path.name} has already been applied")
+    today = istanbul_today(cfg).isoformat()
+    if plan.today != today:
+        # Past/future splits and the events on the page may have moved since
+        raise PlanRejected(f"Plan {path.name} was computed for {plan.today}, today is {today}")
+    if plan.is_empty:
+        logger.info(f"PLAN | {path.name} has nothing to apply | skipped={plan.skipped}")
+        return SyncStats(skipped=plan.skipped, errors=plan.errors, plan_files=[path])
+
+    if plan.calendar_id is None:
+        # The dry run found no calendar and did not create one
+        raise PlanRejected(f"Plan {path.name} was computed before its calendar existed; run a sync instead")
+    calendar_ids = {session.existing_calendar_id(p) for p in cfg.programs} - {None}
+    if plan.calendar_id not in calendar_ids:
+        raise PlanRejected(f"Plan {path.name} targets a calendar this app no longer syncs to ({plan.calendar_id})")
+
+    logger.info(
+        f"PLAN | Applying {path.name} | mode={plan.mode} | create={plan.count('insert')} "
+        f"| patch={plan.count('patch')} | delete={plan.count('delete')}"
     )
+    stats = apply_plan(cfg, logger, session.service, plan.calendar_id, plan, service_factory=session.new_service)
+    plan.applied = True
+    write_plan(path, plan)
+    stats.plan_files.append(path)
+    return stats
 
+
+def run_measured(session: Session, opts: RunOptions) -> SyncStats:
+    """run_once, recording per-stage timings and API counters into metrics.json / sac_sync.prom."""
+    if not opts.metrics:
+        return run_once(session, opts)
+
+    metrics.start_run()
+    try:
+        with metrics.span("total"):
+            stats = run_once(session, opts)
+        for action in ("created", "updated", "deleted", "skipped", "errors", "already_applied"):
+            metrics.incr("events", getattr(stats, action), action=action)
+        return stats
+    finally:
+        paths = metrics.write_reports(app_data_dir(), metrics.stop())
+        session.logger.info(f"METRICS | Wrote {paths[0].name} and {paths[1].name} to {app_data_dir()}")
+
+
+def print_summary(stats: SyncStats, dry_run: bool) -> None:
     print("\n================ SUMMARY ================")
+    if dry_run:
+        print("DRY RUN: nothing was changed; counts show the plan.")
     print(f"Added:    {stats.created}")
     print(f"Updated:  {stats.updated}")
     print(f"Deleted:  {stats.deleted}")
     print(f"Skipped:  {stats.skipped}")
     print(f"Errors:   {stats.errors}")
+    print(f"Already applied: {stats.already_applied}")
+    print(f"Retries:  {stats.retries} ({stats.throttled} rate-limited)")
+    print(f"Throughput: {stats.ops_per_sec:.1f} ops/s ({stats.api_ops} ops in {stats.api_seconds:.1f}s)")
+    for path in stats.plan_files:
+        print(f"Plan file: {path}")
+    if not stats.plan_files:
+        print("Plan file: none (no calendar was synced)")
     print(f"Log file: {log_path()}")
     print("=========================================")
 
 
+def run_daemon(session: Session, opts: RunOptions, interval: float, jitter: float) -> int:
+    logger = session.logger
+    logger.info(f"DAEMON | mode={opts.mode} | interval={interval:.0f}s | jitter={jitter:.0f}s")
+    # The Google libraries stay loaded between cycles, so checking the calendars is one call
+    opts = replace(opts, verify_calendars=True)
+    while True:
+        # The calendar may have been deleted or renamed since the last run. Dropping the
+        # ids makes ensure_calendar check the cached one again (one calendars.get).
+        for program in session.cfg.programs:
+            session.forget_calendar(program)
+        try:
+            with RunLock(lock_path()):
+                stats = run_measured(session, opts)
+            logger.info(
+                f"DAEMON | run done | added={stats.created} updated={stats.updated} "
+                f"deleted={stats.deleted} skipped={stats.skipped} errors={stats.errors}"
+            )
+        except LockBusy as e:
+            logger.warning(f"DAEMON | skipping run | {e}")
+        except SignInRequired as e:
+            # No later run can succeed until someone signs in again
+            logger.error(f"DAEMON | stopping: Google sign-in required | {e}")
+            return 4
+        except Exception as e:
+            # Keep the daemon alive; the next run starts from a fresh listing/state anyway
+            logger.error(f"DAEMON | run failed | {e}")
+
+        delay = max(60.0, interval + random.uniform(-jitter, jitter))
+        logger.info(f"DAEMON | next run in {delay:.0f}s")
+        time.sleep(delay)
+
+
+def export_feed(cfg: AppConfig, logger, strict: bool) -> None:
+    sources = scrape_sources(
+        cfg.sources, strict, logger,
+        timeout=cfg.source_timeout, workers=cfg.source_workers, programs=cfg.programs,
+    )
+    if all(r.error is not None for r in sources):
+        raise RuntimeError(f"No source page could be scraped: {sources[0].error}")
+    events, warnings = merge_events(sources, logger, cfg.duplicate_policy)
+    for w in warnings:
+        logger.warning(f"SCRAPE WARNING | {w}")
+
+    from .ics_feed import export_feeds
+
+    export_feeds(cfg, logger, events, app_data_dir())
+
+
+def run_feed(
+    cfg: AppConfig,
+    logger,
+    strict: bool,
+    export: bool,
+    serve: Optional[Tuple[str, int]],
+    interval: Optional[float],
+    jitter: float,
+) -> int:
+    """
+    --ics / --serve: keeps the .ics feeds in the app data dir current and/or serves
+    them over HTTP. No Google sign-in and no Calendar API calls.
+    """
+    server = None
+    if serve is not None:
+        from .ics_feed import FeedServer
+
+        server = FeedServer(app_data_dir(), serve[0], serve[1], logger, programs=cfg.programs)
+        logger.info(f"FEED | Serving {app_data_dir()} at http://{serve[0]}:{server.server_address[1]}/calendar.ics")
+        if interval is not None:
+            threading.Thread(target=server.serve_forever, name="feed-server", daemon=True).start()
+
+    try:
+        while True:
+            if export:
+                try:
+                    export_feed(cfg, logger, strict)
+                except Exception as e:
+                    logger.error(f"FEED | export failed | {e}")
+                    if server is None and interval is None:
+                        return 1
+            if interval is None:
+                break
+            delay = max(60.0, interval + random.uniform(-jitter, jitter))
+            logger.info(f"FEED | next export in {delay:.0f}s")
+            time.sleep(delay)
+
+        if server is not None:
+            server.serve_forever()
+    finally:
+        if server is not None:
+            server.server_close()
+    return 0
+
+
+def oauth_client_json() -> Optional[Path]:
+    path = Path(__file__).resolve().parents[1] / "assets" / "oauth_client.json"
+    if not path.exists():
+        print("ERROR: Missing assets/oauth_client.json")
+        print("You must place your downloaded Desktop OAuth client JSON there.")
+        return None
+    return path
+
+
+def program_list(text: str) -> Tuple[str, ...]:
+    programs = tuple(dict.fromkeys(p.strip().lower() for p in text.split(",") if p.strip()))
+    if not programs:
+        raise argparse.ArgumentTypeError("no program given")
+    for p in programs:
+        try:
+            program_column(p)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e)) from e
+    return programs
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        prog="SabanciCalendarSync",
+        description="Sync the Sabanci academic calendar (UNDER G.) into Google Calendar. "
+                    "Without --mode it asks interactively.",
+    )
+    ap.add_argument("--mode", choices=MODES, help="run non-interactively in this mode")
+    strict = ap.add_mutually_exclusive_group()
+    strict.add_argument("--strict", dest="strict", action="store_true", default=None,
+                        help="only rows with an UNDER G. date (default)")
+    strict.add_argument("--loose", dest="strict", action="store_false",
+                        help="fall back to any date cell in the row")
+    ap.add_argument("--programs", type=program_list, metavar="LIST",
+                    help="comma-separated date columns to sync, each to its own calendar: undergrad, grad "
+                         "or the words of another column header, e.g. prep-school (default undergrad)")
+    ap.add_argument("--dry-run", action="store_true", help="compute and save the plan, change nothing")
+    ap.add_argument("--apply-plan", type=Path, metavar="PLAN",
+                    help="apply a plan saved by --dry-run today, without planning again")
+    ap.add_argument("--yes", action="store_true", help="confirm remove_all without the DELETE prompt")
+    ap.add_argument("--daemon", action="store_true", help="keep running and re-sync every --interval seconds")
+    ap.add_argument("--interval", type=float, default=6 * 3600, help="seconds between daemon runs (default 6h)")
+    ap.add_argument("--jitter", type=float, default=600, help="random +/- seconds added to each interval")
+    ap.add_argument("--ics", action="store_true",
+                    help="write calendar.ics feeds to the app data dir instead of syncing to Google")
+    ap.add_argument("--serve", action="store_true", help="serve the .ics feeds over HTTP (ETag / 304 aware)")
+    ap.add_argument("--host", default="127.0.0.1", help="address for --serve (default 127.0.0.1)")
+    ap.add_argument("--port", type=int, default=8765, help="port for --serve (default 8765)")
+    ap.add_argument("--accounts-dir", type=Path, help="sync every token file in this directory (fan-out)")
+    ap.add_argument("--workers", type=int, help="worker processes for --accounts-dir")
+    ap.add_argument("--quiet", action="store_true", help="summarize per-event log lines instead of writing each one")
+    ap.add_argument("--log-json", action="store_true", help="also write JSON-lines logs with per-event fields")
+    ap.add_argument("--no-metrics", action="store_true", help="do not write metrics.json / sac_sync.prom")
+    ap.add_argument("--profile-imports", action="store_true", help="report module import times after the run")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.profile_imports:
+        from .import_profile import run_profiled
+
+        raw = sys.argv[1:] if argv is None else argv
+        return run_profiled([a for a in raw if a != "--profile-imports"])
+
+    cfg = AppConfig()
+    if args.programs:
+        cfg = replace(cfg, programs=args.programs)
+    logger = setup_logger(log_path(), json_file=log_json_path() if args.log_json else None, quiet=args.quiet)
+
+    if args.ics or args.serve:
+        strict = cfg.strict_undergrad_only_default if args.strict is None else args.strict
+        return run_feed(
+            cfg, logger, strict,
+            export=args.ics,
+            serve=(args.host, args.port) if args.serve else None,
+            interval=args.interval if args.daemon else None,
+            jitter=args.jitter,
+        )
+
+    if args.accounts_dir is not None and args.daemon:
+        print("ERROR: --daemon does not work with --accounts-dir; schedule the fan-out run instead.")
+        return 2
+
+    if args.apply_plan is not None:
+        oauth_json = oauth_client_json()
+        if oauth_json is None:
+            return 1
+        try:
+            with RunLock(lock_path()):
+                stats = apply_saved_plan(Session(cfg, logger, oauth_json), args.apply_plan)
+        except LockBusy as e:
+            print(f"ERROR: {e}")
+            return 3
+        except PlanRejected as e:
+            logger.error(f"PLAN | {e}")
+            print(f"ERROR: {e}. Compute a new plan with --dry-run.")
+            return 2
+        print_summary(stats, dry_run=False)
+        return 1 if stats.errors else 0
+
+    if args.mode is None:
+        print("===============================================")
+        print(" Sabanci Academic Calendar Sync (UNDER G.)")
+        print(" Made by canadaaww")
+        print("===============================================")
+        opts = ask_options(cfg)
+        if opts is None:
+            return 0
+        opts = replace(opts, metrics=cfg.metrics_enabled and not args.no_metrics)
+    else:
+        strict = cfg.strict_undergrad_only_default if args.strict is None else args.strict
+        opts = RunOptions(
+            mode=args.mode,
+            strict=strict,
+            dry_run=args.dry_run,
+            metrics=cfg.metrics_enabled and not args.no_metrics,
+        )
+        if opts.mode == "remove_all" and not opts.dry_run and not args.yes:
+            print("ERROR: remove_all deletes every event this app created; pass --yes to confirm.")
+            return 2
+
+    if args.accounts_dir is not None:
+        from .fanout import fan_out, print_report
+
+        try:
+            with RunLock(lock_path()):
+                results = fan_out(
+                    cfg, logger, args.accounts_dir, opts.mode, opts.strict, opts.dry_run,
+                    workers=args.workers, record_metrics=opts.metrics,
+                )
+        except LockBusy as e:
+            print(f"ERROR: {e}")
+            return 3
+        print_report(results)
+        return 1 if any(r.error or r.stats.errors for r in results) else 0
+
+    oauth_json = oauth_client_json()
+    if oauth_json is None:
+        return 1
+
+    # Only a run started from the menu may open the browser sign-in; scheduled runs
+    # must not block on it while holding the run lock
+    interactive = args.mode is None and not args.daemon
+    if args.daemon:
+        session = Session(cfg, logger, oauth_json, background_refresh=True, interactive=interactive)
+        return run_daemon(session, opts, args.interval, args.jitter)
+
+    try:
+        with RunLock(lock_path()):
+            stats = run_measured(Session(cfg, logger, oauth_json, interactive=interactive), opts)
+    except LockBusy as e:
+        print(f"ERROR: {e}")
+        return 3
+    except SignInRequired as e:
+        logger.error(f"AUTH | {e}")
+        print(f"ERROR: Google sign-in required: {e}")
+        print("Run the app once without --mode to sign in again.")
+        return 4
+
+    print_summary(stats, opts.dry_run)
+    return 1 if stats.errors else 0
+
+
 if __name__ == "__main__":
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         sys.exit(130)
\ No newline at end of file
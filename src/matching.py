@@ -0,0 +1,49 @@
+# Made by canadaaww
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rapidfuzz import fuzz, process
+
+from . import metrics
+from .models import ExistingEvent
+from .normalize import normalize_title_for_matching
+
+# (start.date, end.date) exactly as stored on an all-day Google event (end exclusive)
+DateKey = Tuple[str, str]
+
+
+class FuzzyMatchIndex:
+    """
+    Existing events bucketed by their all-day date pair, with summaries normalized once.
+    A fuzzy match is only ever looked up inside the bucket with identical dates.
+    """
+
+    def __init__(self, events: Iterable[ExistingEvent]):
+        buckets: Dict[DateKey, Tuple[List[ExistingEvent], List[str]]] = defaultdict(lambda: ([], []))
+        for ev in events:
+            if not ev.start_s or not ev.end_excl_s:
+                continue
+            evs, names = buckets[(ev.start_s, ev.end_excl_s)]
+            evs.append(ev)
+            # Punctuation stripping in the normalizer also drops the leading category emoji
+            names.append(normalize_title_for_matching(ev.summary))
+        self._buckets = dict(buckets)
+
+    def __len__(self) -> int:
+        return sum(len(evs) for evs, _ in self._buckets.values())
+
+    def match(self, norm_title: str, start_s: str, end_excl_s: str, threshold: int = 92) -> Optional[ExistingEvent]:
+        bucket = self._buckets.get((start_s, end_excl_s))
+        if bucket is None:
+            return None
+        evs, names = bucket
+        metrics.incr("fuzzy_match_evaluations", len(names))
+        hit = process.extractOne(norm_title, names, scorer=fuzz.token_sort_ratio, score_cutoff=threshold)
+        return evs[hit[2]] if hit is not None else None
+
+    def match_many(self, queries: Sequence[Tuple[str, str, str]], threshold: int = 92) -> List[Optional[ExistingEvent]]:
+        """queries are (norm_title, start_s, end_excl_s); results keep the query order."""
+        # process.cdist would need numpy, which we don't ship; buckets are tiny anyway
+        return [self.match(norm, s, e, threshold=threshold) for norm, s, e in queries]
\ No newline at end of file
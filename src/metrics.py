@@ -0,0 +1,239 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_BUCKET_LABELS = [*map(str, LATENCY_BUCKETS), "+Inf"]
+
+JSON_NAME = "metrics.json"
+PROM_NAME = "sac_sync.prom"
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, str]) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """Metrics of one run. Thread-safe: the sync executor records from its workers."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.spans: Dict[str, float] = {}
+        self.counters: Dict[_Key, float] = {}
+        self.histograms: Dict[_Key, _Histogram] = {}
+
+    def add_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def incr(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        k = _key(name, labels)
+        with self._lock:
+            self.counters[k] = self.counters.get(k, 0) + value
+
+    def observe(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        k = _key(name, labels)
+        with self._lock:
+            h = self.histograms.get(k)
+            if h is None:
+                h = self.histograms[k] = _Histogram()
+            h.observe(value)
+
+
+_registry: Optional[Registry] = None
+
+
+def start_run() -> Registry:
+    """Starts recording into a fresh registry; until then every call below is a no-op."""
+    global _registry
+    _registry = Registry()
+    return _registry
+
+
+def stop() -> Optional[Registry]:
+    global _registry
+    reg, _registry = _registry, None
+    return reg
+
+
+def incr(name: str, value: float = 1, **labels) -> None:
+    reg = _registry
+    if reg is not None:
+        reg.incr(name, value, labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    reg = _registry
+    if reg is not None:
+        reg.observe(name, value, labels)
+
+
+class _Span:
+    __slots__ = ("_reg", "_name", "_t0")
+
+    def __init__(self, reg: Registry, name: str):
+        self._reg = reg
+        self._name = name
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._reg.add_span(self._name, time.perf_counter() - self._t0)
+
+
+class _ApiCall:
+    __slots__ = ("_reg", "_method", "_t0")
+
+    def __init__(self, reg: Registry, method: str):
+        self._reg = reg
+        self._method = method
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        labels = {"method": self._method}
+        self._reg.incr("api_calls", 1, labels)
+        if exc_type is not None:
+            self._reg.incr("api_errors", 1, labels)
+        self._reg.observe("api_call_seconds", time.perf_counter() - self._t0, labels)
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL = _NullContext()
+
+
+def span(name: str):
+    """Times a stage (fetch, parse, list, ...); repeated spans of one name add up."""
+    reg = _registry
+    return _NULL if reg is None else _Span(reg, name)
+
+
+def api_call(method: str):
+    """Counts one Calendar API round trip and records its latency, e.g. api_call("events.list")."""
+    reg = _registry
+    return _NULL if reg is None else _ApiCall(reg, method)
+
+
+def _labels_dict(key: _Key) -> Dict[str, str]:
+    return dict(key[1])
+
+
+def to_json(reg: Registry) -> Dict:
+    return {
+        "started": reg.started,
+        "finished": time.time(),
+        "spans_seconds": {k: round(v, 6) for k, v in sorted(reg.spans.items())},
+        "counters": [
+            {"name": k[0], "labels": _labels_dict(k), "value": v}
+            for k, v in sorted(reg.counters.items())
+        ],
+        "histograms": [
+            {
+                "name": k[0],
+                "labels": _labels_dict(k),
+                "buckets": dict(zip(_BUCKET_LABELS, h.counts)),
+                "sum": round(h.total, 6),
+                "count": h.count,
+            }
+            for k, h in sorted(reg.histograms.items())
+        ],
+    }
+
+
+def _prom_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_prom_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def to_prometheus(reg: Registry, prefix: str = "sac_sync") -> str:
+    lines: List[str] = []
+
+    lines.append(f"# TYPE {prefix}_stage_seconds gauge")
+    for name, seconds in sorted(reg.spans.items()):
+        lines.append(f"{prefix}_stage_seconds{_prom_labels({'stage': name})} {seconds:.6f}")
+
+    by_name: Dict[str, List] = {}
+    for k, v in sorted(reg.counters.items()):
+        by_name.setdefault(k[0], []).append((_labels_dict(k), v))
+    for name, series in by_name.items():
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        for labels, v in series:
+            lines.append(f"{prefix}_{name}_total{_prom_labels(labels)} {v:g}")
+
+    hist_by_name: Dict[str, List] = {}
+    for k, h in sorted(reg.histograms.items()):
+        hist_by_name.setdefault(k[0], []).append((_labels_dict(k), h))
+    for name, series in hist_by_name.items():
+        lines.append(f"# TYPE {prefix}_{name} histogram")
+        for labels, h in series:
+            cumulative = 0
+            for le, c in zip(_BUCKET_LABELS, h.counts):
+                cumulative += c
+                lines.append(f"{prefix}_{name}_bucket{_prom_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{prefix}_{name}_sum{_prom_labels(labels)} {h.total:.6f}")
+            lines.append(f"{prefix}_{name}_count{_prom_labels(labels)} {h.count}")
+
+    lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+    lines.append(f"{prefix}_last_run_timestamp_seconds {time.time():.0f}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # node_exporter may read the textfile at any moment, so never expose a partial file
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_reports(directory: Path, reg: Optional[Registry] = None, prefix: str = "") -> Optional[Tuple[Path, Path]]:
+    reg = reg or _registry
+    if reg is None:
+        return None
+    json_path, prom_path = directory / (prefix + JSON_NAME), directory / (prefix + PROM_NAME)
+    _write_atomic(json_path, json.dumps(to_json(reg), indent=2))
+    _write_atomic(prom_path, to_prometheus(reg))
+    return json_path, prom_path
\ No newline at end of file
@@ -1,17 +1,87 @@
 # Made by canadaaww
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import asdict, dataclass, field
 from datetime import date
+from typing import Dict, List, Optional
 
+# Program whose date column the app has always synced; it keeps the original calendar
+UNDERGRAD = "undergrad"
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class ParsedEvent:
     title_raw: str
     start: date
     end: date  # inclusive end date
     source_url: str
+    program: str = UNDERGRAD  # date column the event came from
 
     @property
     def is_single_day(self) -> bool:
-        return self.start == self.end
\ No newline at end of file
+        return self.start == self.end
+
+
+class ExistingEvent:
+    """
+    The parts of one of our listed Google events that syncing reads. Slotted, and built
+    in place of the listing's nested dicts, so a multi-year calendar stays small in memory.
+    """
+
+    __slots__ = ("id", "summary", "start_s", "end_excl_s", "uid", "fp")
+
+    def __init__(self, id: str, summary: str, start_s: str, end_excl_s: str, uid: str, fp: Optional[str]):
+        self.id = id
+        self.summary = summary
+        self.start_s = start_s  # all-day dates as Google stores them (end exclusive); "" if not all-day
+        self.end_excl_s = end_excl_s
+        self.uid = uid
+        self.fp = fp
+
+    @classmethod
+    def from_api(cls, ev: Dict, uid_key: str, fp_key: str) -> "ExistingEvent":
+        props = ev.get("extendedProperties", {}).get("private", {}) or {}
+        return cls(
+            ev["id"],
+            ev.get("summary", ""),
+            ev.get("start", {}).get("date") or "",
+            ev.get("end", {}).get("date") or "",
+            props.get(uid_key, ""),
+            props.get(fp_key),
+        )
+
+
+@dataclass
+class CalendarOp:
+    kind: str  # "insert" | "patch" | "delete"
+    body: Optional[Dict] = None
+    event_id: Optional[str] = None
+    label: str = ""
+
+
+@dataclass
+class SyncPlan:
+    mode: str
+    today: str  # ISO date the plan was computed for
+    ops: List[CalendarOp] = field(default_factory=list)
+    skipped: int = 0
+    errors: int = 0  # events that could not be planned
+    calendar_id: Optional[str] = None  # the calendar the plan was diffed against
+    applied: bool = False  # written by a real run: a record of what was sent, without bodies
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.ops
+
+    def count(self, kind: str) -> int:
+        return sum(1 for op in self.ops if op.kind == kind)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, indent=1)
+
+    @classmethod
+    def from_json(cls, text: str) -> "SyncPlan":
+        data = json.loads(text)
+        data["ops"] = [CalendarOp(**op) for op in data.get("ops", [])]
+        return cls(**data)
\ No newline at end of file
@@ -0,0 +1,107 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from .models import UNDERGRAD
+from .scraper import fetch_html_conditional, program_tables_hash
+from .state_store import load_state, save_state
+
+
+@dataclass(frozen=True)
+class PageCheck:
+    url: str
+    html: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    tables_hash: Optional[str]
+    unchanged: bool
+
+
+def sync_target(state_file: Path, token_file: Path, calendar_names: Sequence[str]) -> Optional[Dict]:
+    """
+    The account and calendars a sync writes to: a fingerprint of the saved refresh token
+    (a new sign-in gets a new one) and the cached calendar ids. None when either is not
+    known yet.
+    """
+    try:
+        refresh_token = json.loads(token_file.read_text(encoding="utf-8")).get("refresh_token")
+    except (OSError, ValueError, AttributeError):
+        refresh_token = None
+    ids = load_state(state_file).get("calendar_ids", {})
+    calendars = [ids.get(name) for name in calendar_names]
+    if not refresh_token or not all(calendars):
+        return None
+    return {"account": hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()[:16], "calendars": calendars}
+
+
+def check_page(
+    url: str,
+    state_file: Path,
+    strict_undergrad_only: bool,
+    logger,
+    timeout: float = 30,
+    programs: Sequence[str] = (UNDERGRAD,),
+    target: Optional[Dict] = None,
+) -> PageCheck:
+    """
+    Conditional GET against the last successfully synced copy of the page.
+    unchanged=True means a 304, or a 200 whose program tables hash to the same value,
+    and that copy was synced to `target` (see sync_target).
+    """
+    entry = load_state(state_file).get("pages", {}).get(url)
+    # A different strictness or program set extracts a different event set, and another
+    # account or calendar has none of the events yet, so neither counts as unchanged
+    if entry and (
+        entry.get("strict") != strict_undergrad_only
+        or entry.get("programs", [UNDERGRAD]) != list(programs)
+        or target is None
+        or entry.get("target") != target
+    ):
+        entry = None
+
+    res = fetch_html_conditional(
+        url,
+        etag=entry.get("etag") if entry else None,
+        last_modified=entry.get("last_modified") if entry else None,
+        timeout=timeout,
+    )
+
+    if res.not_modified:
+        logger.info(f"SCRAPE | 304 Not Modified | {url}")
+        return PageCheck(url, None, res.etag, res.last_modified, entry.get("tables_hash"), unchanged=True)
+
+    tables_hash = program_tables_hash(res.html, programs)
+    unchanged = bool(entry) and entry.get("tables_hash") == tables_hash
+    if unchanged:
+        logger.info(f"SCRAPE | Program tables unchanged (hash match) | {url}")
+    return PageCheck(url, res.html, res.etag, res.last_modified, tables_hash, unchanged=unchanged)
+
+
+def mark_page_synced(
+    state_file: Path,
+    check: PageCheck,
+    strict_undergrad_only: bool,
+    programs: Sequence[str] = (UNDERGRAD,),
+    target: Optional[Dict] = None,
+) -> None:
+    state = load_state(state_file)
+    state.setdefault("pages", {})[check.url] = {
+        "etag": check.etag,
+        "last_modified": check.last_modified,
+        "tables_hash": check.tables_hash,
+        "strict": strict_undergrad_only,
+        "programs": list(programs),
+        "target": target,
+    }
+    save_state(state_file, state)
+
+
+def forget_page(state_file: Path, url: str) -> None:
+    state = load_state(state_file)
+    if state.get("pages", {}).pop(url, None) is not None:
+        save_state(state_file, state)
\ No newline at end of file
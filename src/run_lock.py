@@ -0,0 +1,68 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+class LockBusy(Exception):
+    pass
+
+
+class RunLock:
+    """
+    Exclusive, non-blocking lock on a file in the app data dir. The OS drops the
+    lock when the process dies, so a crashed run never leaves a stale lock behind.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fh = None
+
+    def acquire(self) -> bool:
+        fh = open(self.path, "a+", encoding="utf-8")
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(os.getpid()))
+        fh.flush()
+        self._fh = fh
+        return True
+
+    def release(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self) -> "RunLock":
+        if not self.acquire():
+            raise LockBusy(f"Another sync is already running (lock: {self.path})")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
\ No newline at end of file
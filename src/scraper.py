@@ -1,146 +1,329 @@
 # Made by canadaaww
 from __future__ import annotations
 
+import hashlib
 import re
-from typing import List, Tuple
-
-import requests
-from bs4 import BeautifulSoup
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
+from . import metrics
 from .date_parse import parse_undergrad_date_cell
-from .models import ParsedEvent
+from .models import UNDERGRAD, ParsedEvent
+from .transport import http_session, received_bytes
 
 
 UNDERGRAD_HEADER_RE = re.compile(r"UNDER\s*G\.", re.IGNORECASE)
-
-
-def fetch_html(url: str) -> str:
-    headers = {
-        "User-Agent": "SabanciCalendarSync/1.0",
-        "Accept-Language": "en-US,en;q=1.0",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Connection": "keep-alive",
-    }
-    r = requests.get(url, headers=headers, timeout=30)
+GRAD_HEADER_RE = re.compile(r"\bGRAD\.", re.IGNORECASE)
+
+# program -> (column header as printed on the page, pattern that finds it)
+PROGRAM_COLUMNS: Dict[str, Tuple[str, re.Pattern]] = {
+    UNDERGRAD: ("UNDER G.", UNDERGRAD_HEADER_RE),
+    "grad": ("GRAD.", GRAD_HEADER_RE),
+}
+# Any other program names its column: "prep-school" finds a "Prep. School" header
+PROGRAM_NAME_RE = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+TABLE_RE = re.compile(r"<table\b.*?</table\s*>", re.IGNORECASE | re.DOTALL)
+
+_HEADERS = {
+    "User-Agent": "SabanciCalendarSync/1.0",
+    "Accept-Language": "en-US,en;q=1.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Connection": "keep-alive",
+}
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    html: Optional[str]  # None when the server answered 304 Not Modified
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    @property
+    def not_modified(self) -> bool:
+        return self.html is None
+
+
+def fetch_html(url: str, timeout: float = 30) -> str:
+    with metrics.span("fetch"):
+        r = http_session().get(url, headers=_HEADERS, timeout=timeout)
+    metrics.incr("http_bytes", received_bytes(r), target="page", direction="in")
     r.raise_for_status()
     return r.text
 
 
-def _extract_cells_text(cells) -> List[str]:
-    return [" ".join(c.get_text(" ", strip=True).split()) for c in cells]
-
-
-def _header_cells(table) -> List[str]:
+def fetch_html_conditional(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    timeout: float = 30,
+) -> FetchResult:
+    headers = dict(_HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with metrics.span("fetch"):
+        r = http_session().get(url, headers=headers, timeout=timeout)
+    metrics.incr("http_bytes", received_bytes(r), target="page", direction="in")
+    if r.status_code == 304:
+        metrics.incr("page_not_modified")
+        return FetchResult(html=None, etag=etag, last_modified=last_modified)
+    r.raise_for_status()
+    return FetchResult(html=r.text, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+
+
+def program_column(program: str) -> Tuple[str, re.Pattern]:
+    """
+    The header label and pattern of a program's date column. Programs outside
+    PROGRAM_COLUMNS are matched by their words in the header, case and punctuation aside.
+    """
+    known = PROGRAM_COLUMNS.get(program)
+    if known is not None:
+        return known
+    if not PROGRAM_NAME_RE.fullmatch(program):
+        raise ValueError(f"Invalid program name {program!r}: use lowercase letters, digits, '-' and '_'")
+    words = re.split(r"[-_]", program)
+    rx = re.compile(r"(?<!\w)" + r"\W*".join(map(re.escape, words)) + r"(?!\w)", re.IGNORECASE)
+    return " ".join(words).upper(), rx
+
+
+def _program_patterns(programs: Sequence[str]) -> List[re.Pattern]:
+    return [program_column(p)[1] for p in programs]
+
+
+def program_tables_hash(html: str, programs: Sequence[str] = (UNDERGRAD,)) -> str:
+    # Raw-markup hash of the tables we extract from; cheap enough to skip BeautifulSoup entirely
+    patterns = _program_patterns(programs)
+    h = hashlib.sha256()
+    for m in TABLE_RE.finditer(html):
+        table_html = m.group(0)
+        if any(rx.search(table_html) for rx in patterns):
+            h.update(table_html.encode("utf-8"))
+    return h.hexdigest()
+
+
+class _TableView:
+    """
+    Row/cell lookups for one parsed page, each computed once: a table's rows, every row's
+    cells (indexed in a single pass over the table), and a cell's normalized text.
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, list] = {}
+        self._cells: Dict[int, list] = {}
+        self._text: Dict[int, str] = {}
+
+    def _index(self, table) -> list:
+        rows = table.find_all("tr")
+        # Rows of a nested table were already indexed along with the enclosing table
+        fresh = {id(tr) for tr in rows if id(tr) not in self._cells}
+        for key in fresh:
+            self._cells[key] = []
+
+        # Same result as tr.find_all(["th", "td"]) for every row (nested rows included),
+        # from one scan of the table instead of one per row.
+        for cell in table.find_all(["th", "td"]) if fresh else ():
+            p = cell.parent
+            while p is not None and p is not table:
+                if p.name == "tr" and id(p) in fresh:
+                    self._cells[id(p)].append(cell)
+                p = p.parent
+
+        self._rows[id(table)] = rows
+        return rows
+
+    def all_rows(self, table) -> list:
+        rows = self._rows.get(id(table))
+        if rows is None:
+            rows = self._index(table)
+        return rows
+
+    def cells(self, tr) -> list:
+        return self._cells[id(tr)]
+
+    def text(self, cell) -> str:
+        key = id(cell)
+        t = self._text.get(key)
+        if t is None:
+            t = self._text[key] = " ".join(cell.get_text(" ", strip=True).split())
+        return t
+
+    def texts(self, cells) -> List[str]:
+        return [self.text(c) for c in cells]
+
+
+def _header_cells(table, view: _TableView) -> List[str]:
     # 1) Normal case: <thead>
     thead = table.find("thead")
     if thead:
-        ths = thead.find_all(["th", "td"])
-        hdrs = _extract_cells_text(ths)
+        hdrs = view.texts(thead.find_all(["th", "td"]))
         if hdrs:
             return hdrs
 
     # 2) Fallback: first row that contains <th>
-    for tr in table.find_all("tr"):
-        ths = tr.find_all("th")
-        if ths:
-            hdrs = _extract_cells_text(tr.find_all(["th", "td"]))
+    all_rows = view.all_rows(table)
+    for tr in all_rows:
+        if any(c.name == "th" for c in view.cells(tr)):
+            hdrs = view.texts(view.cells(tr))
             if hdrs:
                 return hdrs
 
     # 3) Last resort: use first <tr> as header-like row
-    first_tr = table.find("tr")
-    if first_tr:
-        hdrs = _extract_cells_text(first_tr.find_all(["th", "td"]))
+    if all_rows:
+        hdrs = view.texts(view.cells(all_rows[0]))
         if hdrs:
             return hdrs
 
     return []
 
 
-def _find_undergrad_col_index(headers: List[str]) -> int | None:
-    for i, h in enumerate(headers):
-        if UNDERGRAD_HEADER_RE.search(h):
-            return i
-    return None
+def _program_col_indexes(headers: List[str], programs: Sequence[str]) -> Dict[str, int]:
+    cols: Dict[str, int] = {}
+    for program in programs:
+        rx = program_column(program)[1]
+        for i, h in enumerate(headers):
+            if rx.search(h):
+                cols[program] = i
+                break
+    return cols
 
 
-def _rows(table):
+def _rows(table, view: _TableView):
     # Prefer tbody, but if missing, fall back to all trs.
     tbody = table.find("tbody")
     if tbody:
         return tbody.find_all("tr")
-    return table.find_all("tr")
-
-
-def scrape_undergrad_events(url: str, strict_undergrad_only: bool, logger) -> Tuple[List[ParsedEvent], List[str]]:
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
-
-    tables = soup.find_all("table")
-    if not tables:
-        return [], ["No <table> elements found on the page."]
-
-    extracted: List[ParsedEvent] = []
+    return view.all_rows(table)
+
+
+def scrape_undergrad_events(
+    url: str,
+    strict_undergrad_only: bool,
+    logger,
+    html: Optional[str] = None,
+) -> Tuple[List[ParsedEvent], List[str]]:
+    return scrape_program_events(url, strict_undergrad_only, logger, html=html)
+
+
+def scrape_program_events(
+    url: str,
+    strict_undergrad_only: bool,
+    logger,
+    html: Optional[str] = None,
+    programs: Sequence[str] = (UNDERGRAD,),
+) -> Tuple[List[ParsedEvent], List[str]]:
+    """
+    Events of every program in `programs`, read from their date columns in one pass
+    over the page. Strict: a row without a date in a program's column is skipped for
+    that program; loose: it falls back to any date on the row.
+    """
     warnings: List[str] = []
+    events = list(iter_program_events(url, strict_undergrad_only, logger, html, programs, warnings))
+    return events, warnings
+
+
+def iter_program_events(
+    url: str,
+    strict_undergrad_only: bool,
+    logger,
+    html: Optional[str] = None,
+    programs: Sequence[str] = (UNDERGRAD,),
+    warnings: Optional[List[str]] = None,
+) -> Iterator[ParsedEvent]:
+    """
+    scrape_program_events as a generator: each event is yielded as soon as its row is
+    read, so a consumer (e.g. sync) can work while the rest of the page is extracted.
+    Warnings are appended to `warnings`, complete once the generator is exhausted.
+    The "extract" span then includes the consumer's time.
+    """
+    if warnings is None:
+        warnings = []
+    header_patterns = _program_patterns(programs)
+    labels = {p: program_column(p)[0] for p in programs}
+    if html is None:
+        html = fetch_html(url)
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # Only <table> subtrees are built; the rest of the page is skipped by the parser
+    with metrics.span("parse"):
+        soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("table"))
+        tables = soup.find_all("table")
+    view = _TableView()
 
-    found_any_undergrad_header = False
-
-    for t_index, table in enumerate(tables):
-        headers = _header_cells(table)
-        if not headers:
-            continue
-
-        ug_idx = _find_undergrad_col_index(headers)
-        if ug_idx is None:
-            continue
-
-        found_any_undergrad_header = True
+    if not tables:
+        warnings.append("No <table> elements found on the page.")
+        return
 
-        trs = _rows(table)
-        if not trs:
-            continue
+    found_programs = set()
+    tags = {p: f" | program={p}" if len(programs) > 1 else "" for p in programs}
 
-        # If the first row looks like headers, skip it from data rows
-        first_cells = trs[0].find_all(["th", "td"])
-        first_text = " ".join([c.get_text(" ", strip=True) for c in first_cells])
-        if UNDERGRAD_HEADER_RE.search(first_text):
-            trs = trs[1:]
+    with metrics.span("extract"):
+        for t_index, table in enumerate(tables):
+            headers = _header_cells(table, view)
+            if not headers:
+                continue
 
-        for r_index, tr in enumerate(trs):
-            tds = tr.find_all(["td", "th"])
-            if not tds:
+            cols = _program_col_indexes(headers, programs)
+            if not cols:
                 continue
 
-            title = " ".join(tds[0].get_text(" ", strip=True).split()) if len(tds) >= 1 else ""
-            if not title:
+            found_programs.update(cols)
+
+            view.all_rows(table)
+            trs = _rows(table, view)
+            if not trs:
                 continue
 
-            ug_text = ""
-            if len(tds) > ug_idx:
-                ug_text = " ".join(tds[ug_idx].get_text(" ", strip=True).split())
+            # If the first row looks like headers, skip it from data rows
+            first_text = " ".join(view.texts(view.cells(trs[0])))
+            if any(rx.search(first_text) for rx in header_patterns):
+                trs = trs[1:]
 
-            if not ug_text:
-                if strict_undergrad_only:
-                    logger.info(f"SKIP (no UNDER G. date) | table={t_index} row={r_index} | {title}")
+            for r_index, tr in enumerate(trs):
+                tds = view.cells(tr)
+                if not tds:
                     continue
 
-                # Non-strict: try any cell that parses as a date/range
-                for c in tds[1:]:
-                    candidate = " ".join(c.get_text(" ", strip=True).split())
-                    if parse_undergrad_date_cell(candidate) is not None:
-                        ug_text = candidate
-                        break
-
-            parsed = parse_undergrad_date_cell(ug_text)
-            if parsed is None:
-                logger.error(f"ERROR (unparseable date) | {title} | cell='{ug_text}'")
-                warnings.append(f"Unparseable date for '{title}': '{ug_text}'")
-                continue
-
-            start, end_inclusive = parsed
-            extracted.append(ParsedEvent(title_raw=title, start=start, end=end_inclusive, source_url=url))
-            logger.info(f"EXTRACT | {title} | {start.isoformat()}..{end_inclusive.isoformat()}")
+                title = view.text(tds[0])
+                if not title:
+                    continue
 
-    if not found_any_undergrad_header:
-        warnings.append("No table with an 'UNDER G.' header was detected.")
-    return extracted, warnings
\ No newline at end of file
+                for program, col in cols.items():
+                    tag = tags[program]
+                    date_text = ""
+                    if len(tds) > col:
+                        date_text = view.text(tds[col])
+
+                    if not date_text:
+                        if strict_undergrad_only:
+                            logger.info(
+                                "SKIP (no %s date) | table=%d row=%d | %s%s",
+                                labels[program], t_index, r_index, title, tag,
+                                extra={"op": "skip_no_date", "title": title, "program": program},
+                            )
+                            continue
+
+                        # Non-strict: try any cell that parses as a date/range
+                        for c in tds[1:]:
+                            candidate = view.text(c)
+                            if parse_undergrad_date_cell(candidate) is not None:
+                                date_text = candidate
+                                break
+
+                    parsed = parse_undergrad_date_cell(date_text)
+                    if parsed is None:
+                        logger.error(f"ERROR (unparseable date) | {title} | cell='{date_text}'{tag}")
+                        warnings.append(f"Unparseable date for '{title}': '{date_text}'{tag}")
+                        continue
+
+                    start, end_inclusive = parsed
+                    logger.info(
+                        "EXTRACT | %s | %s..%s%s", title, start, end_inclusive, tag,
+                        extra={"op": "extract", "title": title, "start": start, "end": end_inclusive, "program": program},
+                    )
+                    yield ParsedEvent(title_raw=title, start=start, end=end_inclusive, source_url=url, program=program)
+
+    for program in programs:
+        if program not in found_programs:
+            warnings.append(f"No table with an '{labels[program]}' header was detected.")
\ No newline at end of file
@@ -0,0 +1,135 @@
+# Made by canadaaww
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import metrics
+from .dedupe import dedupe_events, iter_dedupe_events
+from .models import UNDERGRAD, ParsedEvent
+from .page_state import PageCheck, check_page
+from .scraper import fetch_html, iter_program_events, scrape_program_events
+
+
+@dataclass
+class SourceResult:
+    url: str
+    check: Optional[PageCheck] = None  # set when scraped against the page state
+    events: List[ParsedEvent] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    html: Optional[str] = None  # the fetched page, when scraped with extract=False
+
+    @property
+    def unchanged(self) -> bool:
+        return self.check is not None and self.check.unchanged
+
+
+def _extract(
+    res: SourceResult,
+    strict: bool,
+    logger,
+    timeout: float,
+    state_file: Optional[Path],
+    programs: Sequence[str],
+    target: Optional[Dict],
+    extract: bool,
+) -> SourceResult:
+    try:
+        html = None
+        if state_file is not None and res.check is None:
+            res.check = check_page(
+                res.url, state_file, strict, logger, timeout=timeout, programs=programs, target=target
+            )
+            if res.check.unchanged:
+                return res
+        if res.check is not None:
+            html = res.check.html
+        if html is None:
+            html = fetch_html(res.url, timeout=timeout)
+        if not extract:
+            res.html = html
+            return res
+        res.events, res.warnings = scrape_program_events(res.url, strict, logger, html=html, programs=programs)
+    except Exception as e:
+        res.error = str(e)
+        metrics.incr("source_errors")
+        logger.error(f"SCRAPE | Source failed | {res.url} | {e}")
+    return res
+
+
+def scrape_sources(
+    urls: Sequence[str],
+    strict: bool,
+    logger,
+    timeout: float = 30,
+    workers: int = 4,
+    state_file: Optional[Path] = None,
+    programs: Sequence[str] = (UNDERGRAD,),
+    target: Optional[Dict] = None,
+    extract: bool = True,
+) -> List[SourceResult]:
+    """
+    Fetches and extracts every source on a thread pool; results come back in `urls`
+    order. With state_file, each page is first checked against its last copy synced to
+    target (see page_state.sync_target):
+    when none changed nothing is extracted, otherwise all of them are, so the merged
+    stream is always complete. A failing source is reported in its result instead of
+    failing the others. With extract=False pages are only fetched, for
+    iter_source_events to extract while they are synced.
+    """
+    results = [SourceResult(u) for u in urls]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls))), thread_name_prefix="scrape") as pool:
+
+        def run(batch: List[SourceResult]) -> None:
+            list(pool.map(lambda r: _extract(r, strict, logger, timeout, state_file, programs, target, extract), batch))
+
+        run(results)
+        if state_file is not None and not all(r.unchanged for r in results):
+            # Pages that did not change still belong in the merged stream
+            run([r for r in results if r.unchanged and not r.events and r.html is None])
+    return results
+
+
+def iter_source_events(
+    res: SourceResult,
+    strict: bool,
+    logger,
+    program: str,
+    policy: str,
+    warnings: List[str],
+) -> Iterator[ParsedEvent]:
+    """
+    One program's events from a page scraped with extract=False, deduplicated as they
+    are extracted; policy must be one of dedupe.STREAMING_POLICIES. Each program parses
+    the page again, so only its own events are ever in memory. Warnings are appended
+    to `warnings` once the generator is exhausted.
+    """
+    events = iter_program_events(res.url, strict, logger, html=res.html, programs=(program,), warnings=warnings)
+    return iter_dedupe_events(events, logger, policy, warnings)
+
+
+def merge_events(
+    results: Sequence[SourceResult],
+    logger,
+    policy: str = "keep_all",
+) -> Tuple[List[ParsedEvent], List[str]]:
+    """
+    One deduplicated event stream (see dedupe_events) in source order, so the first
+    source listing an event wins. Warnings keep the source they came from when there
+    is more than one.
+    """
+    multi = len(results) > 1
+    events: List[ParsedEvent] = []
+    warnings: List[str] = []
+    for r in results:
+        prefix = f"{r.url}: " if multi else ""
+        if r.error is not None:
+            warnings.append(f"{prefix}Source could not be scraped: {r.error}")
+        warnings.extend(prefix + w for w in r.warnings)
+        events.extend(r.events)
+
+    events, dropped = dedupe_events(events, logger, policy)
+    return events, warnings + dropped
\ No newline at end of file
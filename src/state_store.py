@@ -0,0 +1,22 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+
+def load_state(path: Path) -> Dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_state(path: Path, state: Dict) -> None:
+    # Write-then-rename so an interrupted run never leaves a truncated state file
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
\ No newline at end of file
@@ -1,16 +1,29 @@
 # Made by canadaaww
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Tuple
-
-from rapidfuzz import fuzz
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from . import metrics
 from .categorize import categorize
 from .config import AppConfig
+from .event_state import is_ours, load_existing_events
+from .executor import ConcurrentExecutor
+from .google_calendar import AlreadyApplied, calendar_is_shared, list_events_in_window, recreate_calendar
+from .models import CalendarOp, ExistingEvent, SyncPlan
 from .normalize import compute_uid, normalize_title_for_matching
 
+if TYPE_CHECKING:
+    from .matching import FuzzyMatchIndex
+
 
 @dataclass
 class SyncStats:
@@ -19,6 +32,21 @@ class SyncStats:
     deleted: int = 0
     skipped: int = 0
     errors: int = 0
+    already_applied: int = 0
+    retries: int = 0
+    throttled: int = 0
+    api_ops: int = 0
+    api_seconds: float = 0.0
+    # The plan of every sync that wrote one, in sync order
+    plan_files: List[Path] = field(default_factory=list)
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.api_ops / self.api_seconds if self.api_seconds > 0 else 0.0
+
+    def add(self, other: "SyncStats") -> None:
+        for name in self.__dataclass_fields__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
 
 
 def _as_all_day_gcal_dates(start: date, end_inclusive: date) -> Tuple[str, str]:
@@ -36,23 +64,46 @@ def _is_future_or_today(event_start: date, today_ist: date) -> bool:
     return event_start >= today_ist
 
 
-def _build_event_body(cfg: AppConfig, title_raw: str, start: date, end_inclusive: date, uid: str) -> Dict:
+# Body fields that define what the user sees; extendedProperties are bookkeeping
+_FINGERPRINT_FIELDS = ("summary", "start", "end", "colorId", "reminders", "description")
+
+
+def _body_fingerprint(body: Dict) -> str:
+    canonical = json.dumps(
+        {k: body.get(k) for k in _FINGERPRINT_FIELDS},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _build_event_body(
+    cfg: AppConfig,
+    title_raw: str,
+    start: date,
+    end_inclusive: date,
+    uid: str,
+    source_url: Optional[str] = None,
+) -> Dict:
     cat = categorize(title_raw)
     emoji_title = f"{cat.emoji} {title_raw}"
 
     start_s, end_excl_s = _as_all_day_gcal_dates(start, end_inclusive)
+    # Credit the page the event was scraped from (one of cfg.sources)
+    source_url = source_url or cfg.source_url
 
     body = {
         "summary": emoji_title,
         "start": {"date": start_s},
         "end": {"date": end_excl_s},
         "colorId": cat.color_id,
-        "description": f"Source: {cfg.source_url}\nMade by canadaaww",
+        "description": f"Source: {source_url}\nMade by canadaaww",
         "extendedProperties": {
             "private": {
                 cfg.tag_key: cfg.tag_value,
                 cfg.uid_key: uid,
-                cfg.src_key: cfg.source_url,
+                cfg.src_key: source_url,
             }
         },
     }
@@ -64,168 +115,490 @@ def _build_event_body(cfg: AppConfig, title_raw: str, start: date, end_inclusive
             "overrides": [{"method": "popup", "minutes": cat.reminder_minutes}],
         }
 
+    body["extendedProperties"]["private"][cfg.fp_key] = _body_fingerprint(body)
     return body
 
 
-def _extract_private_props(cfg: AppConfig, g_event: Dict) -> Dict[str, str]:
-    return (g_event.get("extendedProperties", {}).get("private", {}) or {})
+def _is_unchanged(cfg: AppConfig, existing_ev: ExistingEvent, body: Dict) -> bool:
+    want = body["extendedProperties"]["private"]
+    return existing_ev.fp == want[cfg.fp_key] and existing_ev.uid == want[cfg.uid_key]
 
 
-def _is_ours(cfg: AppConfig, g_event: Dict) -> bool:
-    props = _extract_private_props(cfg, g_event)
-    return props.get(cfg.tag_key) == cfg.tag_value and cfg.uid_key in props
+class EventIndex:
+    """Our existing events, keyed by uid, plus a fuzzy-match index built on first use."""
 
+    def __init__(self, cfg: AppConfig, existing_events: Iterable[Dict]):
+        self.by_uid: Dict[str, ExistingEvent] = {}
+        self.ours: List[ExistingEvent] = []
+        # Date pairs with at least one of our events; only those can have a fuzzy match
+        self.date_keys: Set[Tuple[str, str]] = set()
+        for raw in existing_events:
+            if not is_ours(cfg, raw):
+                continue
+            ev = ExistingEvent.from_api(raw, cfg.uid_key, cfg.fp_key)
+            self.ours.append(ev)
+            self.date_keys.add((ev.start_s, ev.end_excl_s))
+            if ev.uid:
+                self.by_uid[ev.uid] = ev
+        self._matcher: Optional[FuzzyMatchIndex] = None
 
-def _index_existing(cfg: AppConfig, existing_events: List[Dict]) -> Tuple[Dict[str, Dict], List[Dict]]:
-    by_uid: Dict[str, Dict] = {}
-    ours: List[Dict] = []
-    for ev in existing_events:
-        if not _is_ours(cfg, ev):
-            continue
-        ours.append(ev)
-        props = _extract_private_props(cfg, ev)
-        uid = props.get(cfg.uid_key)
-        if uid:
-            by_uid[uid] = ev
-    return by_uid, ours
-
-
-def _best_fuzzy_match(
-    norm_title: str,
-    start_s: str,
-    end_excl_s: str,
-    candidates: List[Dict],
-    threshold: int = 92,
-) -> Optional[Dict]:
-    best = None
-    best_score = -1
-    for ev in candidates:
-        s = ev.get("start", {}).get("date")
-        e = ev.get("end", {}).get("date")
-        if s != start_s or e != end_excl_s:
-            continue
+    @property
+    def matcher(self) -> FuzzyMatchIndex:
+        if self._matcher is None:
+            # rapidfuzz is only imported when a uid miss actually needs fuzzy matching
+            from .matching import FuzzyMatchIndex
 
-        summary = ev.get("summary", "")
-        # remove leading emoji if present
-        summary_norm = normalize_title_for_matching(summary)
-        score = fuzz.token_sort_ratio(norm_title, summary_norm)
-        if score > best_score:
-            best_score = score
-            best = ev
+            self._matcher = FuzzyMatchIndex(self.ours)
+        return self._matcher
 
-    if best is not None and best_score >= threshold:
-        return best
-    return None
 
+def _listing_window(parsed_events: List, mode: str, today_ist: date) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Smallest listing window the mode needs. Fuzzy matches require identical dates, so add
+    modes only need the span of the scraped future events; removals need everything before
+    today (None = open-ended).
+    """
+    upcoming = [pe for pe in parsed_events if _is_future_or_today(pe.start, today_ist)]
+    add_start = min((pe.start for pe in upcoming), default=None)
+    add_end = max((pe.end for pe in upcoming), default=None)
 
-def sync(
+    if mode == "add_future":
+        return add_start, add_end
+    if mode == "add_future_remove_past":
+        return None, max(add_end, today_ist) if add_end else today_ist
+    if mode == "remove_past":
+        return None, today_ist - timedelta(days=1)
+    return None, None
+
+
+def list_existing(
     cfg: AppConfig,
     logger,
     calendar_service,
     calendar_id: str,
     parsed_events: List,
     mode: str,
-    strict_undergrad_only: bool,
-    dry_run: bool = False,
-) -> SyncStats:
+    today_ist: date,
+    state_file: Optional[Path] = None,
+) -> EventIndex:
+    if state_file is not None:
+        existing = load_existing_events(cfg, logger, calendar_service, calendar_id, state_file)
+    else:
+        list_start, list_end = _listing_window(parsed_events, mode, today_ist)
+        existing = []
+        if mode != "add_future" or list_start is not None:
+            existing = list_events_in_window(
+                calendar_service,
+                calendar_id,
+                list_start,
+                list_end,
+                logger,
+                private_props={cfg.tag_key: cfg.tag_value},
+            )
+    return EventIndex(cfg, existing)
+
+
+@dataclass
+class DesiredEvent:
+    """A scraped future event with its uid and Google body, independent of any calendar."""
+
+    title_raw: str
+    span: str  # "start..end" for log lines
+    norm: str
+    uid: str
+    start_s: str
+    end_excl_s: str
+    body: Optional[Dict]  # None if the body could not be built
+
+
+def iter_desired(cfg: AppConfig, logger, parsed_events: Iterable, today_ist: date) -> Iterator[DesiredEvent]:
+    for pe in parsed_events:
+        if not _is_future_or_today(pe.start, today_ist):
+            continue
+        norm = normalize_title_for_matching(pe.title_raw)
+        uid = compute_uid(pe.start.isoformat(), pe.end.isoformat(), norm)
+        start_s, end_excl_s = _as_all_day_gcal_dates(pe.start, pe.end)
+        try:
+            # Timed per event: the consumer's time between events must not count
+            with metrics.span("categorize"):
+                body = _build_event_body(cfg, pe.title_raw, pe.start, pe.end, uid, pe.source_url)
+        except Exception as e:
+            body = None
+            logger.error(f"ERROR | add/update failed | {pe.title_raw} | {e}")
+        yield DesiredEvent(pe.title_raw, f"{pe.start}..{pe.end}", norm, uid, start_s, end_excl_s, body)
+
+
+def build_desired(cfg: AppConfig, logger, parsed_events: Iterable, today_ist: date) -> List[DesiredEvent]:
+    return list(iter_desired(cfg, logger, parsed_events, today_ist))
+
+
+def _insert_event_id(uid: str) -> str:
+    # Hex is valid base32hex, the alphabet of Calendar event ids. The suffix keeps the id
+    # fresh when an event is re-added, since Google keeps ids of deleted events reserved.
+    return uid + os.urandom(4).hex()
+
+
+def _plan_against(cfg: AppConfig, logger, plan: SyncPlan, d: DesiredEvent, existing_ev: Optional[ExistingEvent]):
+    if existing_ev is None:
+        event_id = _insert_event_id(d.uid)
+        logger.info(
+            "CREATE | %s | %s | uid=%s", d.title_raw, d.span, d.uid,
+            extra={"op": "create", "uid": d.uid, "event_id": event_id, "title": d.title_raw},
+        )
+        return CalendarOp(kind="insert", body=d.body, event_id=event_id, label=d.title_raw)
+    if _is_unchanged(cfg, existing_ev, d.body):
+        logger.info(
+            "SKIP (unchanged) | %s | %s | uid=%s", d.title_raw, d.span, d.uid,
+            extra={"op": "unchanged", "uid": d.uid, "event_id": existing_ev.id, "title": d.title_raw},
+        )
+        plan.skipped += 1
+        return None
+    logger.info(
+        "UPDATE | %s | %s | uid=%s | id=%s", d.title_raw, d.span, d.uid, existing_ev.id,
+        extra={"op": "update", "uid": d.uid, "event_id": existing_ev.id, "title": d.title_raw},
+    )
+    return CalendarOp(kind="patch", body=d.body, event_id=existing_ev.id, label=d.title_raw)
+
+
+def iter_plan(
+    cfg: AppConfig,
+    logger,
+    parsed_events: Iterable,
+    index: EventIndex,
+    mode: str,
+    plan: SyncPlan,
+    today_ist: date,
+    desired: Optional[Iterable[DesiredEvent]] = None,
+    keep_bodies: bool = True,
+) -> Iterator[CalendarOp]:
+    """
+    The ops of plan_sync, yielded as each is decided and recorded in `plan` as they
+    go, so a consumer can start sending them while parsed_events (which may be a
+    generator) is still being produced. With keep_bodies=False the plan records ops
+    without their bodies; only the yielded op carries one.
+    The "plan" span covers the decisions only, not the time spent in the consumer.
     """
+
+    def record(op: Optional[CalendarOp]) -> Optional[CalendarOp]:
+        if op is not None:
+            plan.ops.append(op if keep_bodies or op.body is None else replace(op, body=None))
+        return op
+
+    # Add/update
+    if mode in ("add_future", "add_future_remove_past"):
+        if desired is None:
+            desired = iter_desired(cfg, logger, parsed_events, today_ist)
+
+        seen: Set[str] = set()
+        duplicates = 0
+        # An event is written by at most one desired event: exact uid matches keep theirs,
+        # and of several titles fuzzy-matching the same old event only the first takes it.
+        # Fuzzy candidates therefore wait until every exact match has claimed its event.
+        claimed: Set[str] = set()
+        deferred: List[DesiredEvent] = []
+        for d in desired:
+            with metrics.span("plan"):
+                op = None
+                if d.body is None:
+                    plan.errors += 1
+                # Rows sharing a uid would each plan a write (by_uid only knows the listing)
+                elif d.uid in seen:
+                    duplicates += 1
+                else:
+                    seen.add(d.uid)
+                    existing_ev = index.by_uid.get(d.uid)
+                    if existing_ev is not None:
+                        claimed.add(existing_ev.id)
+                        op = record(_plan_against(cfg, logger, plan, d, existing_ev))
+                    elif (d.start_s, d.end_excl_s) in index.date_keys:
+                        deferred.append(d)
+                    else:
+                        op = record(_plan_against(cfg, logger, plan, d, None))
+            if op is not None:
+                yield op
+
+        if duplicates:
+            logger.warning(f"PLAN | Ignored {duplicates} duplicate event(s) with the same uid")
+            plan.skipped += duplicates
+
+        # fuzzy update: same dates but title changed slightly
+        hits = []
+        if deferred:
+            with metrics.span("plan"):
+                hits = index.matcher.match_many([(d.norm, d.start_s, d.end_excl_s) for d in deferred], threshold=92)
+        for d, existing_ev in zip(deferred, hits):
+            with metrics.span("plan"):
+                if existing_ev is not None:
+                    if existing_ev.id in claimed:
+                        existing_ev = None
+                    else:
+                        claimed.add(existing_ev.id)
+                op = record(_plan_against(cfg, logger, plan, d, existing_ev))
+            if op is not None:
+                yield op
+
+    # Deletions
+    if mode in ("add_future_remove_past", "remove_past", "remove_all"):
+        for ev in index.ours:
+            with metrics.span("plan"):
+                op = None
+                try:
+                    if ev.start_s and ev.end_excl_s:
+                        end_inclusive = date.fromisoformat(ev.end_excl_s) - timedelta(days=1)
+                        should_delete = False
+
+                        if mode == "remove_all":
+                            should_delete = True
+                        elif mode in ("add_future_remove_past", "remove_past"):
+                            if _is_past(end_inclusive, today_ist):
+                                should_delete = True
+
+                        if not should_delete:
+                            plan.skipped += 1
+                        else:
+                            logger.info(
+                                "DELETE | %s | ends=%s | id=%s", ev.summary, end_inclusive, ev.id,
+                                extra={"op": "delete", "event_id": ev.id, "title": ev.summary},
+                            )
+                            op = record(CalendarOp(kind="delete", event_id=ev.id, label=ev.summary))
+
+                except Exception as e:
+                    plan.errors += 1
+                    logger.error(f"ERROR | delete failed | id={ev.id} | {e}")
+            if op is not None:
+                yield op
+
+
+def _log_plan(logger, plan: SyncPlan) -> None:
+    logger.info(
+        f"PLAN | mode={plan.mode} | create={plan.count('insert')} | patch={plan.count('patch')} "
+        f"| delete={plan.count('delete')} | skipped={plan.skipped} | errors={plan.errors}"
+    )
+
+
+def plan_sync(
+    cfg: AppConfig,
+    logger,
+    parsed_events: List,
+    index: EventIndex,
+    mode: str,
+    today_ist: date,
+    desired: Optional[List[DesiredEvent]] = None,
+) -> SyncPlan:
+    """
+    Pure diff, no network access: the create/patch/delete ops that bring the calendar
+    in line with parsed_events for the given mode. desired (from build_desired) can be
+    passed in to reuse bodies across several calendars.
+
     mode:
       - add_future
       - add_future_remove_past
       - remove_past
       - remove_all
     """
-    stats = SyncStats()
+    plan = SyncPlan(mode=mode, today=today_ist.isoformat())
+    if desired is None and mode in ("add_future", "add_future_remove_past"):
+        desired = build_desired(cfg, logger, parsed_events, today_ist)
+    for _ in iter_plan(cfg, logger, parsed_events, index, mode, plan, today_ist, desired=desired):
+        pass
+    _log_plan(logger, plan)
+    return plan
 
-    today_ist = date.today()  # OS local date; later we will ensure Istanbul specifically in main.py
-    # We'll fix Istanbul date in main.py using cfg.tz; keep here simple.
 
-    # Define a listing window: from 1 year ago to 2 years ahead (wide enough, page is "current year" anyway)
-    list_start = today_ist - timedelta(days=400)
-    list_end = today_ist + timedelta(days=800)
+def write_plan(path: Path, plan: SyncPlan) -> None:
+    path.write_text(plan.to_json(), encoding="utf-8")
 
-    existing = calendar_service.events().list(
-        calendarId=calendar_id,
-        timeMin=f"{list_start.isoformat()}T00:00:00+03:00",
-        timeMax=f"{(list_end + timedelta(days=1)).isoformat()}T00:00:00+03:00",
-        singleEvents=True,
-        showDeleted=False,
-        maxResults=2500,
-    ).execute().get("items", [])
 
-    by_uid, ours = _index_existing(cfg, existing)
+def read_plan(path: Path) -> SyncPlan:
+    return SyncPlan.from_json(path.read_text(encoding="utf-8"))
 
-    logger.info(f"SYNC | mode={mode} | existing_ours={len(ours)} | scraped={len(parsed_events)} | dry_run={dry_run}")
 
-    # Build desired set depending on mode
-    desired = []
-    for pe in parsed_events:
-        if mode in ("add_future", "add_future_remove_past"):
-            if _is_future_or_today(pe.start, today_ist):
-                desired.append(pe)
-        # remove modes don't need desired
+class PlanRejected(Exception):
+    """A saved plan that must not be applied as it is; compute a new one."""
 
-    # Add/update
-    if mode in ("add_future", "add_future_remove_past"):
-        for pe in desired:
-            try:
-                norm = normalize_title_for_matching(pe.title_raw)
-                uid = compute_uid(pe.start.isoformat(), pe.end.isoformat(), norm)
-
-                start_s, end_excl_s = _as_all_day_gcal_dates(pe.start, pe.end)
-
-                existing_ev = by_uid.get(uid)
-                if existing_ev is None:
-                    # fuzzy update: same dates but title changed slightly
-                    existing_ev = _best_fuzzy_match(norm, start_s, end_excl_s, ours, threshold=92)
-
-                body = _build_event_body(cfg, pe.title_raw, pe.start, pe.end, uid)
-
-                if existing_ev is None:
-                    logger.info(f"CREATE | {pe.title_raw} | {pe.start}..{pe.end} | uid={uid}")
-                    if not dry_run:
-                        calendar_service.events().insert(calendarId=calendar_id, body=body).execute()
-                    stats.created += 1
-                else:
-                    ev_id = existing_ev["id"]
-                    logger.info(f"UPDATE | {pe.title_raw} | {pe.start}..{pe.end} | uid={uid} | id={ev_id}")
-                    if not dry_run:
-                        calendar_service.events().patch(calendarId=calendar_id, eventId=ev_id, body=body).execute()
-                    stats.updated += 1
 
-            except Exception as e:
+def apply_plan(
+    cfg: AppConfig,
+    logger,
+    calendar_service,
+    calendar_id: str,
+    plan: SyncPlan,
+    dry_run: bool = False,
+    service_factory: Optional[Callable[[], object]] = None,
+    ops: Optional[Iterable[CalendarOp]] = None,
+) -> SyncStats:
+    """
+    Sends plan.ops, or `ops` when given: a stream (see iter_plan) that fills the plan
+    while it is being sent. Skips and planning errors are read from the plan after
+    the stream has been consumed.
+    """
+    stats = SyncStats()
+    executor = None
+    if dry_run:
+        results = ((op, None, None) for op in plan.ops)
+    elif ops is None and plan.is_empty:
+        results = iter(())
+    else:
+        # Without a factory we only have the caller's service, which must not be shared across threads
+        workers = cfg.sync_workers if service_factory is not None else 1
+        executor = ConcurrentExecutor(
+            service_factory=service_factory or (lambda: calendar_service),
+            calendar_id=calendar_id,
+            logger=logger,
+            workers=workers,
+            max_retries=cfg.sync_max_retries,
+        )
+        results = executor.run(plan.ops if ops is None else ops)
+
+    # Results are counted as they arrive and not kept; each op (and its body) is
+    # dropped once its batch is done
+    debug = logger.isEnabledFor(logging.DEBUG)
+    t0 = time.monotonic()
+    with metrics.span("apply") if executor is not None else nullcontext():
+        for op, err, seconds in results:
+            if executor is not None:
+                stats.api_ops += 1
+            if debug:
+                logger.debug(
+                    "APPLIED | %s | %s | id=%s | %s", op.kind, op.label, op.event_id, "ok" if err is None else err,
+                    extra={
+                        "op": f"applied_{op.kind}",
+                        "event_id": op.event_id,
+                        "title": op.label,
+                        "latency_ms": round(seconds * 1000, 1) if seconds is not None else None,
+                        "error": None if err is None else str(err),
+                    },
+                )
+            if isinstance(err, AlreadyApplied):
+                # Sent before (e.g. the same plan applied twice); nothing changed now
+                stats.already_applied += 1
+            elif err is not None:
                 stats.errors += 1
-                logger.error(f"ERROR | add/update failed | {pe.title_raw} | {e}")
-
-    # Deletions
-    if mode in ("add_future_remove_past", "remove_past", "remove_all"):
-        for ev in ours:
-            try:
-                s = ev.get("start", {}).get("date")
-                e = ev.get("end", {}).get("date")  # exclusive
-                if not s or not e:
-                    continue
-
-                end_inclusive = date.fromisoformat(e) - timedelta(days=1)
-                should_delete = False
-
-                if mode == "remove_all":
-                    should_delete = True
-                elif mode in ("add_future_remove_past", "remove_past"):
-                    if _is_past(end_inclusive, today_ist):
-                        should_delete = True
-
-                if not should_delete:
-                    stats.skipped += 1
-                    continue
-
-                logger.info(f"DELETE | {ev.get('summary','')} | ends={end_inclusive} | id={ev['id']}")
-                if not dry_run:
-                    calendar_service.events().delete(calendarId=calendar_id, eventId=ev["id"]).execute()
+                what = "add/update" if op.kind in ("insert", "patch") else "delete"
+                logger.error(f"ERROR | {what} failed | {op.label} | id={op.event_id} | {err}")
+            elif op.kind == "insert":
+                stats.created += 1
+            elif op.kind == "patch":
+                stats.updated += 1
+            elif op.kind == "delete":
                 stats.deleted += 1
+    if executor is not None:
+        stats.api_seconds += time.monotonic() - t0
+        stats.retries += executor.retries
+        stats.throttled += executor.throttled
+    stats.skipped += plan.skipped
+    stats.errors += plan.errors
+    return stats
+
+
+def _purge_by_recreate(
+    cfg: AppConfig,
+    logger,
+    calendar_service,
+    calendar_id: str,
+    calendar_name: str,
+    listed: int,
+    index: EventIndex,
+    state_file: Optional[Path],
+) -> Optional[SyncStats]:
+    """
+    remove_all in a constant number of calls: when the calendar holds only our events
+    and nobody else has access to it, deleting and recreating it replaces one delete
+    per event. Returns None when the per-event path has to run instead.
+    """
+    ours = len(index.ours)
+    foreign = listed - ours
+    if foreign or ours < cfg.recreate_min_events:
+        logger.info(f"PURGE | Deleting per event | ours={ours} | foreign={foreign}")
+        return None
+    if calendar_is_shared(calendar_service, calendar_id, logger):
+        logger.info(f"PURGE | Calendar is shared; deleting per event | ours={ours}")
+        return None
+
+    t0 = time.monotonic()
+    with metrics.span("apply"):
+        recreate_calendar(calendar_service, calendar_id, calendar_name, logger, state_file)
+    stats = SyncStats(deleted=ours, api_ops=2, api_seconds=time.monotonic() - t0)
+    logger.info(f"PURGE | Recreated the calendar; {ours} event(s) went with the old one")
+    return stats
 
-            except Exception as e:
-                stats.errors += 1
-                logger.error(f"ERROR | delete failed | id={ev.get('id')} | {e}")
 
+def sync(
+    cfg: AppConfig,
+    logger,
+    calendar_service,
+    calendar_id: Optional[str],
+    parsed_events: Iterable,
+    mode: str,
+    strict_undergrad_only: bool,
+    dry_run: bool = False,
+    service_factory: Optional[Callable[[], object]] = None,
+    state_file: Optional[Path] = None,
+    today_ist: Optional[date] = None,
+    plan_file: Optional[Path] = None,
+    desired: Optional[List[DesiredEvent]] = None,
+    calendar_name: Optional[str] = None,
+) -> SyncStats:
+    """
+    List, plan, then apply. With dry_run the plan is computed (and written to
+    plan_file, if given) but nothing is sent to Google; the stats report what
+    would have happened. A dry run may pass calendar_id=None for a calendar that
+    does not exist yet; it is planned as an empty one (everything is an insert).
+    Otherwise ops are sent in batches as they are planned, and parsed_events may
+    be a generator (e.g. straight from the scraper) when state_file holds the
+    listing window.
+
+    remove_all with calendar_name may delete and recreate the whole calendar instead
+    (see _purge_by_recreate); the calendar then has a new id, cached in state_file.
+    """
+    if today_ist is None:
+        today_ist = date.today()  # OS local date; main.py passes the Istanbul date
+    if calendar_id is None and not dry_run:
+        raise ValueError("sync needs a calendar_id unless dry_run is set")
+    if state_file is None and not isinstance(parsed_events, list):
+        # The listing window is taken from the events themselves
+        parsed_events = list(parsed_events)
+
+    purge = mode == "remove_all" and calendar_name is not None and cfg.recreate_on_remove_all and not dry_run
+    with metrics.span("list"):
+        if calendar_id is None:
+            index = EventIndex(cfg, [])
+        elif purge:
+            # Foreign events must be seen too, so this one listing is unfiltered
+            listed = list_events_in_window(calendar_service, calendar_id, None, None, logger)
+            index = EventIndex(cfg, listed)
+        else:
+            index = list_existing(cfg, logger, calendar_service, calendar_id, parsed_events, mode, today_ist, state_file)
+
+    if purge:
+        stats = _purge_by_recreate(
+            cfg, logger, calendar_service, calendar_id, calendar_name, len(listed), index, state_file
+        )
+        if stats is not None:
+            return stats
+
+    scraped = len(parsed_events) if isinstance(parsed_events, list) else "streamed"
+    logger.info(f"SYNC | mode={mode} | existing_ours={len(index.ours)} | scraped={scraped} | dry_run={dry_run}")
+
+    if dry_run:
+        plan = plan_sync(cfg, logger, parsed_events, index, mode, today_ist, desired=desired)
+        plan.calendar_id = calendar_id
+        stats = apply_plan(cfg, logger, calendar_service, calendar_id, plan, dry_run=True)
+        if plan_file is not None:
+            write_plan(plan_file, plan)
+            stats.plan_files.append(plan_file)
+        return stats
+
+    # Planning runs inside the executor's submit loop, so the first batch goes out
+    # as soon as it is full; the "apply" span therefore includes planning time. The
+    # plan only keeps a body-less record of each op, written to plan_file afterwards.
+    plan = SyncPlan(mode=mode, today=today_ist.isoformat(), calendar_id=calendar_id, applied=True)
+    ops = iter_plan(cfg, logger, parsed_events, index, mode, plan, today_ist, desired=desired, keep_bodies=False)
+    stats = apply_plan(
+        cfg, logger, calendar_service, calendar_id, plan, service_factory=service_factory, ops=ops
+    )
+    _log_plan(logger, plan)
+    if plan_file is not None:
+        write_plan(plan_file, plan)
+        stats.plan_files.append(plan_file)
     return stats
\ No newline at end of file
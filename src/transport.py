@@ -0,0 +1,174 @@
+# Made by canadaaww
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from . import metrics
+
+# requests, httplib2 and google-auth are imported on first use so that importing
+# this module stays cheap for runs that exit early (see main.py)
+
+_POOL_SIZE = 16
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """
+    The process-wide requests.Session: keep-alive connection pool, gzip, shared by the
+    scraper, the Calendar services and token refreshes so TLS handshakes are reused.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_POOL_SIZE)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers["Accept-Encoding"] = "gzip, deflate"
+            _session = s
+        return _session
+
+
+def received_bytes(r) -> int:
+    """
+    Size of a requests.Response as it came over the wire: the compressed size of a gzip
+    body, where len(r.content) is the decoded one. Call it once the body has been read.
+    """
+    tell = getattr(r.raw, "tell", None)
+    if tell is not None:
+        return tell()
+    length = r.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else len(r.content)
+
+
+def _utcnow() -> datetime:
+    # google-auth keeps expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CredentialManager:
+    """
+    Thread-safe holder for OAuth credentials. Refreshes shortly before expiry, either on
+    demand or from a background thread (start()), and persists the token only when it
+    actually changed.
+    """
+
+    def __init__(self, creds, token_json: Optional[Path] = None, logger=None, refresh_margin: float = 300.0):
+        self._creds = creds
+        self._token_json = token_json
+        self._logger = logger
+        self._margin = timedelta(seconds=refresh_margin)
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def credentials(self):
+        self.ensure_fresh()
+        return self._creds
+
+    def _needs_refresh(self) -> bool:
+        c = self._creds
+        if not c.token:
+            return True
+        return c.expiry is not None and c.expiry - self._margin <= _utcnow()
+
+    def refresh(self) -> None:
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            before = self._creds.token
+            self._creds.refresh(Request(session=http_session()))
+            if self._creds.token != before and self._token_json is not None:
+                self._token_json.write_text(self._creds.to_json(), encoding="utf-8")
+            metrics.incr("token_refreshes")
+            if self._logger:
+                self._logger.info(f"AUTH | Token refreshed | expires={self._creds.expiry}")
+
+    def ensure_fresh(self) -> None:
+        if not self._needs_refresh():
+            return
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._needs_refresh():
+                self.refresh()
+
+    def apply(self, headers: Dict[str, str]) -> None:
+        self.ensure_fresh()
+        with self._lock:
+            self._creds.apply(headers)
+
+    def _seconds_until_refresh(self) -> float:
+        expiry = self._creds.expiry
+        if expiry is None:
+            return self._margin.total_seconds()
+        return (expiry - self._margin - _utcnow()).total_seconds()
+
+    def _run(self) -> None:
+        while not self._stop.wait(max(30.0, self._seconds_until_refresh())):
+            try:
+                self.ensure_fresh()
+            except Exception as e:
+                # The next wait is at least 30s; callers still refresh on demand meanwhile
+                if self._logger:
+                    self._logger.warning(f"AUTH | Background token refresh failed | {e}")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="token-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class SessionHttp:
+    """
+    httplib2.Http look-alike for googleapiclient that sends through the shared
+    requests.Session and signs requests with a CredentialManager.
+    """
+
+    def __init__(self, manager: CredentialManager, timeout: float = 60.0):
+        self._manager = manager
+        self.timeout = timeout
+
+    @property
+    def credentials(self):
+        # googleapiclient signs each sub-request of a batch with these
+        return self._manager.credentials
+
+    def _send(self, uri: str, method: str, body, headers: Dict[str, str]):
+        headers = dict(headers or {})
+        self._manager.apply(headers)
+        return http_session().request(method, uri, data=body, headers=headers, timeout=self.timeout)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None) -> Tuple[object, bytes]:
+        import httplib2
+
+        r = self._send(uri, method, body, headers)
+        if r.status_code == 401:
+            self._manager.refresh()
+            r = self._send(uri, method, body, headers)
+
+        metrics.incr("http_bytes", len(body or b""), target="calendar", direction="out")
+        metrics.incr("http_bytes", received_bytes(r), target="calendar", direction="in")
+
+        info = {k.lower(): v for k, v in r.headers.items()}
+        # requests already decoded the body
+        info.pop("content-encoding", None)
+        info["status"] = str(r.status_code)
+        info["reason"] = r.reason
+        return httplib2.Response(info), r.content
+
+    def close(self) -> None:
+        pass
\ No newline at end of file